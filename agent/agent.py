@@ -1,15 +1,43 @@
-import heapq
+from collections import deque
+
+from agent.bitboard import BitboardKB, KBView, iter_row
+from agent.inference import RiskModel
+from env.percept import BREEZE, GLITTER, SCREAM, SEEN, STENCH
+
+DIR_DELTA = [(0,1), (1,0), (0,-1), (-1,0)]
+
+
+class Plan:
+    """Chuỗi hành động đã biên dịch từ một đường đi (frontier_search) tới target"""
+
+    def __init__(self, target, path, actions):
+        self.target = target
+        self.cells = set(path[1:])    # các ô còn phải đi qua
+        self.actions = deque(actions)  # (action, (x, y, dir) trước khi làm action)
+
 
 class Agent:
-    def __init__(self, N):
+    def __init__(self, N, p=0.2, K=1, incremental=True):
         self.N = N
         self.x, self.y = 0, 0  # Start at (0,0)
         self.dir = 1
-        self.kb = [['unknown' for _ in range(N)] for _ in range(N)]
+        # KB dạng bitboard; self.kb là view đọc kb[y][x] như list cũ
+        self.bits = BitboardKB(N)
+        self.kb = KBView(self.bits)
         self.visited = set()
         self.has_gold = False
         self.action_log = []
-        self.percept_history = {}  # {(x, y): percepts dict}
+        # Percept từng ô (env/percept.py), chỉ số x * N + y; bit SEEN: ô đã có percept
+        self.percept_history = bytearray(N * N)
+        # incremental=True: chỉ suy luận lại các ô quanh ô vừa cập nhật percept
+        # (kết quả kb giống hệt quét toàn map, xem update_percepts)
+        self.incremental = incremental
+        # Xác suất pit/wumpus ở các ô biên, p và K là prior của map
+        self.risk_model = RiskModel(N, p, K)
+        self.risk = None  # tính lại khi cần sau mỗi lần update_percepts
+        self.plan = None
+        # Gắn runner.profiler.Profiler để đo thời gian từng phase (None: tắt)
+        self.profiler = None
 
     def get_neighbors(self, x, y):
         for dx, dy in [(-1,0),(1,0),(0,-1),(0,1)]:
@@ -18,83 +46,77 @@ class Agent:
                 yield (nx, ny)
 
     def update_percepts(self, percepts):
+        prof = self.profiler
+        if prof:
+            t0 = prof.start()
         x, y = self.x, self.y
+        breeze = bool(percepts & BREEZE)
+        stench = bool(percepts & STENCH)
         self.visited.add((x, y))
-        self.kb[y][x] = 'visited'
-        self.percept_history[(x, y)] = dict(percepts)
-
-        # Xử lý scream percept - Wumpus bị giết
-        if percepts.get('scream', False):
-            # Cập nhật KB: tất cả ô có stench giờ có thể an toàn
-            for i in range(self.N):
-                for j in range(self.N):
-                    if self.kb[j][i] == 'warn':
-                        # Kiểm tra xem ô này có còn stench không
-                        has_stench = False
-                        for nx, ny in self.get_neighbors(i, j):
-                            if (nx, ny) in self.visited:
-                                p = self.percept_history.get((nx, ny), {})
-                                if p.get('stench', False):
-                                    has_stench = True
-                                    break
-                        if not has_stench:
-                            self.kb[j][i] = 'safe'
-        
+        self.bits.set_label(x, y, 'visited')
+        self.bits.set_percept(x, y, breeze, stench)
+        i = x * self.N + y
+        old = self.percept_history[i]
+        self.percept_history[i] = percepts | SEEN
+        self.risk = None
+        # Stench đổi ở ô cũ nghĩa là wumpus đã di chuyển: lập lại đường đi
+        if old & SEEN and (old ^ percepts) & STENCH:
+            self.plan = None
+
+        # Xử lý scream percept - Wumpus bị giết: ô warn không còn stench kề thành safe
+        if percepts & SCREAM:
+            self.plan = None
+            if prof:
+                t1 = prof.start()
+            self.bits.infer_scream()
+            if prof:
+                prof.stop('agent.infer_scream', t1)
+
         # 1. Mark all neighbors safe if NO warn
-        if not percepts.get('breeze', False) and not percepts.get('stench', False):
-            for nx, ny in self.get_neighbors(x, y):
-                if self.kb[ny][nx] == 'unknown':
-                    self.kb[ny][nx] = 'safe'
-
-        # 2. Classic warn inference: mark warn/danger if enough warn sources
-        for i in range(self.N):
-            for j in range(self.N):
-                if self.kb[j][i] in ['unknown', 'warn']:
-                    warn_sources = 0
-                    neighbors_visited = 0
-                    for nx, ny in self.get_neighbors(i, j):
-                        if (nx, ny) in self.visited:
-                            neighbors_visited += 1
-                            p = self.percept_history.get((nx, ny), {})
-                            if p.get('breeze', False) or p.get('stench', False):
-                                warn_sources += 1
-                    if warn_sources > 0:
-                        self.kb[j][i] = 'warn'
-                    if neighbors_visited >= 2 and warn_sources == neighbors_visited:
-                        self.kb[j][i] = 'danger'
-
-        # 3. Nâng cao: Chỉ mark danger nếu SỐ WARN Ở PERCEPT HIỆN TẠI == SỐ Ô ĐI MỚI
-        for i in range(self.N):
-            for j in range(self.N):
-                if (i, j) in self.visited:
-                    new_cells = [(nx, ny) for nx, ny in self.get_neighbors(i, j) if (nx, ny) not in self.visited]
-                    if not new_cells:
-                        continue
-                    percept = self.percept_history.get((i, j), {})
-                    n_warn = int(percept.get('breeze', False)) + int(percept.get('stench', False))
-                    if n_warn == len(new_cells) and n_warn > 0:
-                        for nx, ny in new_cells:
-                            self.kb[ny][nx] = 'danger'
-
-        # 4. Backward inference: nếu đã mark warn nhưng neighbor không còn warn thì chuyển safe
-        for i in range(self.N):
-            for j in range(self.N):
-                if self.kb[j][i] == 'warn':
-                    has_no_warn_neighbor = False
-                    for nx, ny in self.get_neighbors(i, j):
-                        if (nx, ny) in self.visited:
-                            p = self.percept_history.get((nx, ny), {})
-                            if not p.get('breeze', False) and not p.get('stench', False):
-                                has_no_warn_neighbor = True
-                                break
-                    if has_no_warn_neighbor:
-                        self.kb[j][i] = 'safe'
+        if not breeze and not stench:
+            self.bits.mark_safe_around(x, y)
+
+        if self.incremental:
+            # Chỉ percept của (x, y) vừa đổi nên chỉ các ô kề nó có thể đổi kết
+            # luận ở bước 2 và 4; bước 3 chỉ cần xét (x, y) và các ô đã đi kề
+            # nó (số ô mới của chúng vừa giảm). Các ô khác cho kết quả như bước trước.
+            dirty = self.bits.neighbor_mask(x, y)
+            sources = dict(dirty)
+            sources[y] |= 1 << x
+        else:
+            dirty = sources = self.bits.all_rows()
+
+        if prof:
+            t1 = prof.start()
+        # 2. Warn/danger theo số ô đã đi kề báo breeze/stench
+        new_danger = [self.bits.infer_warn(dirty)]
+        if prof:
+            prof.stop('agent.infer_warn', t1)
+            t1 = prof.start()
+        # 3. Số percept ở ô đã đi == số ô kề chưa đi thì các ô đó danger
+        new_danger.append(self.bits.infer_danger(sources))
+        if prof:
+            prof.stop('agent.infer_danger', t1)
+            t1 = prof.start()
+        # 4. Backward inference: ô warn có ô đã đi kề không báo gì thì safe
+        self.bits.infer_safe(dirty)
+        if prof:
+            prof.stop('agent.infer_safe', t1)
+            prof.stop('agent.update_percepts', t0)
+
+        # Ô nguy hiểm mới nằm trên đường đang đi thì bỏ kế hoạch
+        if self.plan is not None:
+            for rows in new_danger:
+                for ny, row in rows.items():
+                    if any((nx, ny) in self.plan.cells for nx in iter_row(row)):
+                        self.plan = None
+                        return
 
     def next_action(self, percepts):
         self.update_percepts(percepts)
         x, y = self.x, self.y
         # Ưu tiên lấy vàng nếu thấy glitter
-        if percepts.get('glitter'):
+        if percepts & GLITTER:
             self.action_log.append('grab')
             return 'grab'
         # Về nhà nếu đã có vàng và ở (0,0)
@@ -108,7 +130,7 @@ class Agent:
             return action
 
         # Logic bắn tên: nếu có stench và có tên thì bắn
-        if percepts.get('stench', False) and hasattr(self, 'agent_arrows') and self.agent_arrows > 0:
+        if percepts & STENCH and hasattr(self, 'agent_arrows') and self.agent_arrows > 0:
             # Tìm Wumpus để bắn
             wumpus_target = self.find_wumpus_to_shoot()
             if wumpus_target:
@@ -122,17 +144,27 @@ class Agent:
                     self.action_log.append('shoot')
                     return 'shoot'
                     
-        # Ưu tiên đi safe chưa đi
-        target = self.find_unvisited(['safe'])
-        if target:
-            action = self.move_towards(*target)
+        # Ưu tiên đi safe chưa đi gần nhất (tính cả số lần xoay).
+        # Đang có kế hoạch tới một ô safe chưa đi thì đi tiếp, không tìm lại
+        plan = self.plan
+        if plan is not None and self.bits.label(*plan.target) == 'safe':
+            action = self.move_towards(*plan.target)
+            self.action_log.append(action)
+            return action
+        found = self.find_nearest(['safe'])
+        if found:
+            action = self.follow(*found)
             self.action_log.append(action)
             return action
 
-        # Hết safe thì đi warn chưa đi (liều)
-        target = self.find_unvisited(['warn'])
-        if target:
-            action = self.move_towards(*target)
+        # Hết safe thì đi ô warn chưa đi có xác suất nguy hiểm thấp nhất (liều)
+        if plan is not None and self.bits.label(*plan.target) == 'warn':
+            action = self.move_towards(*plan.target)
+            self.action_log.append(action)
+            return action
+        found = self.find_least_risky(['warn'])
+        if found:
+            action = self.follow(*found)
             self.action_log.append(action)
             return action
 
@@ -145,65 +177,145 @@ class Agent:
             self.action_log.append(action)
             return action
 
-    def find_unvisited(self, types):
-        for i in range(self.N):
-            for j in range(self.N):
-                if self.kb[j][i] in types and (i, j) not in self.visited:
-                    return (i, j)
-        return None
+    def frontier_search(self, types, first_only, target=None):
+        """BFS trên (x, y, hướng) từ vị trí agent, mỗi forward/left/right tốn 1.
 
-    def move_towards(self, tx, ty):
-        path = self.astar((self.x, self.y), (tx, ty))
-        if len(path) <= 1:
-            return 'climb' if (self.x, self.y) == (0, 0) else 'forward'
-        next_pos = path[1]
-        nx, ny = next_pos
-        dx, dy = nx - self.x, ny - self.y
-        new_dir = None
-        if dx == 1: new_dir = 1
-        elif dx == -1: new_dir = 3
-        elif dy == 1: new_dir = 0
-        elif dy == -1: new_dir = 2
-        if new_dir is not None and new_dir != self.dir:
-            if (new_dir - self.dir) % 4 == 1:
-                return 'right'
-            else:
-                return 'left'
+        Chỉ đi qua ô đã đi hoặc safe; đích là các ô chưa đi có nhãn trong types,
+        hoặc đúng ô target nếu có. Trả về {ô đích: trạng thái đầu tiên tới được},
+        kèm bảng parent để dựng đường.
+        """
+        prof = self.profiler
+        if prof:
+            t0 = prof.start()
+        start = (self.x, self.y, self.dir)
+        parent = {start: None}
+        found = {}
+        if target is not None:
+            n_goals = 1
+
+            def is_goal(x, y):
+                return (x, y) == target
         else:
-            return 'forward'
+            goal_rows = [getattr(self.bits, t) for t in types]
+            if not any(any(rows) for rows in goal_rows):
+                if prof:
+                    prof.stop('agent.frontier_search', t0)
+                return found, parent
+            n_goals = 1 if first_only else sum(self.bits.count(t) for t in types)
 
-    def astar(self, start, goal):
-        frontier = []
-        heapq.heappush(frontier, (0, start))
-        came_from = {}
-        cost_so_far = {start: 0}
-        while frontier:
-            _, current = heapq.heappop(frontier)
-            if current == goal:
-                break
-            for dx, dy in [(-1,0),(1,0),(0,-1),(0,1)]:
-                nx, ny = current[0]+dx, current[1]+dy
-                if 0 <= nx < self.N and 0 <= ny < self.N:
-                    status = self.kb[ny][nx]
-                    if status not in ['danger']:
-                        if status in ['safe', 'visited', 'warn', 'unknown'] or (nx, ny) == goal:
-                            new_cost = cost_so_far[current] + 1
-                            if (nx, ny) not in cost_so_far or new_cost < cost_so_far[(nx, ny)]:
-                                cost_so_far[(nx, ny)] = new_cost
-                                priority = new_cost + abs(nx - goal[0]) + abs(ny - goal[1])
-                                heapq.heappush(frontier, (priority, (nx, ny)))
-                                came_from[(nx, ny)] = current
-        if goal not in came_from and start != goal:
-            return [start]
-        path = [goal]
-        while path[-1] != start:
-            path.append(came_from[path[-1]])
+            def is_goal(x, y):
+                return any(rows[y] >> x & 1 for rows in goal_rows)
+
+        queue = deque([start])
+        while queue:
+            state = queue.popleft()
+            x, y, d = state
+            if (x, y) not in found and is_goal(x, y):
+                found[(x, y)] = state
+                if len(found) == n_goals:
+                    break
+            if state != start and (x, y) not in self.visited and not self.bits.safe[y] >> x & 1:
+                continue  # Không đi xuyên qua ô warn
+            dx, dy = DIR_DELTA[d]
+            nx, ny = x + dx, y + dy
+            nexts = [(x, y, (d - 1) % 4), (x, y, (d + 1) % 4)]
+            if 0 <= nx < self.N and 0 <= ny < self.N and (
+                    (nx, ny) in self.visited or self.bits.safe[ny] >> nx & 1 or is_goal(nx, ny)):
+                nexts.append((nx, ny, d))
+            for nxt in nexts:
+                if nxt not in parent:
+                    parent[nxt] = state
+                    queue.append(nxt)
+        if prof:
+            prof.stop('agent.frontier_search', t0)
+            prof.count('agent.frontier_search', len(parent))
+        return found, parent
+
+    def build_path(self, state, parent):
+        path = []
+        while state is not None:
+            if not path or path[-1] != state[:2]:
+                path.append(state[:2])
+            state = parent[state]
         path.reverse()
         return path
 
+    def find_nearest(self, types):
+        """Ô chưa đi gần nhất có nhãn trong types: (ô, đường đi) hoặc None"""
+        found, parent = self.frontier_search(types, first_only=True)
+        for target, state in found.items():
+            return target, self.build_path(state, parent)
+        return None
+
+    def find_path(self, target):
+        """Đường ngắn nhất tới target chỉ qua ô đã đi hoặc safe ([] nếu không có)"""
+        found, parent = self.frontier_search((), first_only=True, target=target)
+        return self.build_path(found[target], parent) if target in found else []
+
+    def get_risk(self):
+        """{ô biên: (p_pit, p_wumpus, p_nguy_hiểm)}, tính từ percept_history"""
+        if self.risk is None:
+            prof = self.profiler
+            if prof:
+                t0 = prof.start()
+            self.risk = self.risk_model.probabilities(self.visited, self.percept_history)
+            if prof:
+                prof.stop('agent.risk', t0)
+        return self.risk
+
+    def find_least_risky(self, types):
+        """Ô ít nguy hiểm nhất (bằng nhau thì gần hơn): (ô, đường đi) hoặc None"""
+        found, parent = self.frontier_search(types, first_only=False)
+        if not found:
+            return None
+        risk = self.get_risk()
+        # found giữ thứ tự tìm thấy (gần trước) nên min() chọn ô gần hơn khi bằng nhau
+        target = min(found, key=lambda c: risk[c][2] if c in risk else 1.0)
+        return target, self.build_path(found[target], parent)
+
+    def follow(self, target, path):
+        """Đi theo đường đã tìm được tới target"""
+        if self.plan is None or self.plan.target != target:
+            self.plan = Plan(target, path, self.compile_path(path))
+        return self.move_towards(*target)
+
+    def move_towards(self, tx, ty):
+        """Hành động tiếp theo để đi tới (tx, ty), dùng lại kế hoạch đã lập nếu còn đúng"""
+        plan = self.plan
+        pose = (self.x, self.y, self.dir)
+        if plan is None or plan.target != (tx, ty) or not plan.actions or plan.actions[0][1] != pose:
+            # Lập lại đường bằng cùng BFS chỉ qua ô an toàn như lúc chọn đích
+            path = self.find_path((tx, ty))
+            if len(path) <= 1:
+                self.plan = None
+                return 'climb' if (self.x, self.y) == (0, 0) else 'forward'
+            plan = self.plan = Plan((tx, ty), path, self.compile_path(path))
+        action, _ = plan.actions.popleft()
+        if action == 'forward':
+            # Ô sắp bước vào không còn là phần đường phía trước
+            dx, dy = DIR_DELTA[self.dir]
+            plan.cells.discard((self.x + dx, self.y + dy))
+        if not plan.actions:
+            self.plan = None
+        return action
+
+    def compile_path(self, path):
+        """Đổi đường đi thành các lệnh left/right/forward kèm tư thế trước mỗi lệnh"""
+        actions = []
+        (x, y), d = path[0], self.dir
+        for nx, ny in path[1:]:
+            new_dir = DIR_DELTA.index((nx - x, ny - y))
+            while d != new_dir:
+                turn = 'right' if (new_dir - d) % 4 == 1 else 'left'
+                actions.append((turn, (x, y, d)))
+                d = (d + 1) % 4 if turn == 'right' else (d - 1) % 4
+            actions.append(('forward', (x, y, d)))
+            x, y = nx, ny
+        return actions
+
     def update_agent_state(self, action, percepts):
         if action == 'forward':
-            dx, dy = [(0,1), (1,0), (0,-1), (-1,0)][self.dir]
+            dx, dy = DIR_DELTA[self.dir]
             self.x += dx
             self.y += dy
         elif action == 'left':
@@ -222,12 +334,10 @@ class Agent:
 
     def find_wumpus_to_shoot(self):
         """Tìm Wumpus để bắn tên"""
-        for i in range(self.N):
-            for j in range(self.N):
-                if self.kb[j][i] == 'warn' and (i, j) not in self.visited:
-                    # Kiểm tra xem có thể bắn được không
-                    if self.can_shoot_at(i, j):
-                        return (i, j)
+        for i, j in sorted(self.bits.cells('warn')):
+            # Kiểm tra xem có thể bắn được không
+            if self.can_shoot_at(i, j):
+                return (i, j)
         return None
 
     def can_shoot_at(self, target_x, target_y):
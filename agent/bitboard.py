@@ -0,0 +1,233 @@
+"""Knowledge base của Agent dạng bitboard.
+
+Mỗi nhãn (visited, safe, warn, danger) và mỗi percept đã thấy (breeze, stench)
+là một list N số nguyên, phần tử thứ y là hàng y với bit x là ô (x, y).
+'unknown' là các ô không thuộc nhãn nào. Lan truyền sang ô kề là phép dịch
+bit trong hàng (x +- 1) và OR với hàng trên/dưới (y +- 1), nên mỗi bước suy
+luận tốn chi phí theo số word của hàng chứ không theo số ô.
+
+Các bước suy luận ở đây cho kết quả giống hệt phiên bản duyệt từng ô cũ của
+Agent.update_percepts (xem từng hàm).
+"""
+
+LABELS = ('visited', 'safe', 'warn', 'danger')
+
+
+def iter_row(row):
+    """Các x có bit bật trong một hàng"""
+    while row:
+        low = row & -row
+        yield low.bit_length() - 1
+        row ^= low
+
+
+class BitboardKB:
+    def __init__(self, N):
+        self.N = N
+        self.full = (1 << N) - 1
+        self.visited = [0] * N
+        self.safe = [0] * N
+        self.warn = [0] * N
+        self.danger = [0] * N
+        self.breeze = [0] * N
+        self.stench = [0] * N
+
+    # --- Truy cập từng ô -------------------------------------------------
+
+    def label(self, x, y):
+        bit = 1 << x
+        if self.visited[y] & bit:
+            return 'visited'
+        if self.safe[y] & bit:
+            return 'safe'
+        if self.warn[y] & bit:
+            return 'warn'
+        if self.danger[y] & bit:
+            return 'danger'
+        return 'unknown'
+
+    def set_label(self, x, y, label):
+        bit = 1 << x
+        for name in LABELS:
+            rows = getattr(self, name)
+            if name == label:
+                rows[y] |= bit
+            else:
+                rows[y] &= ~bit
+
+    def set_percept(self, x, y, breeze, stench):
+        bit = 1 << x
+        self.breeze[y] = self.breeze[y] | bit if breeze else self.breeze[y] & ~bit
+        self.stench[y] = self.stench[y] | bit if stench else self.stench[y] & ~bit
+
+    def cells(self, label):
+        rows = getattr(self, label)
+        for y, row in enumerate(rows):
+            for x in iter_row(row):
+                yield (x, y)
+
+    def count(self, label):
+        return sum(bin(row).count('1') for row in getattr(self, label))
+
+    def unknown_row(self, y):
+        return self.full & ~(self.visited[y] | self.safe[y] | self.warn[y] | self.danger[y])
+
+    # --- Phép toán trên hàng ----------------------------------------------
+
+    def directions(self, row_of, y):
+        """4 hàng 'ô kề theo từng hướng' của hàng y: (phải, trái, dưới, trên)"""
+        r = row_of(y)
+        return ((r >> 1), (r << 1) & self.full,
+                row_of(y - 1) if y > 0 else 0,
+                row_of(y + 1) if y + 1 < self.N else 0)
+
+    def spread(self, row_of, y):
+        """Ô ở hàng y có ít nhất một ô kề thuộc tập"""
+        a, b, c, d = self.directions(row_of, y)
+        return a | b | c | d
+
+    def neighbor_mask(self, x, y):
+        """{y: mask} các ô kề (x, y)"""
+        row = 0
+        if x > 0:
+            row |= 1 << (x - 1)
+        if x + 1 < self.N:
+            row |= 1 << (x + 1)
+        masks = {y: row}
+        if y > 0:
+            masks[y - 1] = 1 << x
+        if y + 1 < self.N:
+            masks[y + 1] = 1 << x
+        return masks
+
+    def all_rows(self):
+        return {y: self.full for y in range(self.N)}
+
+    def warn_source(self, y):
+        return self.visited[y] & (self.breeze[y] | self.stench[y])
+
+    def clean(self, y):
+        return self.visited[y] & ~(self.breeze[y] | self.stench[y])
+
+    def visited_stench(self, y):
+        return self.visited[y] & self.stench[y]
+
+    def not_visited(self, y):
+        return self.full & ~self.visited[y]
+
+    # --- Các bước suy luận ------------------------------------------------
+
+    def infer_scream(self):
+        """Ô warn không còn ô đã đi nào có stench kề thì thành safe"""
+        for y in range(self.N):
+            w = self.warn[y]
+            if w:
+                s = w & ~self.spread(self.visited_stench, y)
+                self.warn[y] &= ~s
+                self.safe[y] |= s
+
+    def mark_safe_around(self, x, y):
+        """Không có breeze/stench: các ô kề chưa biết thành safe"""
+        for ny, m in self.neighbor_mask(x, y).items():
+            self.safe[ny] |= m & self.unknown_row(ny)
+
+    def infer_warn(self, masks):
+        """Ô unknown/warn: có ô đã đi kề báo breeze/stench thì warn; mọi ô đã đi
+        kề (ít nhất 2) đều báo thì danger"""
+        new_danger = {}
+        for y, m in masks.items():
+            e = m & (self.unknown_row(y) | self.warn[y])
+            if not e:
+                continue
+            a, b, c, d = self.directions(self.warn_source, y)
+            warn = e & (a | b | c | d)
+            if not warn:
+                continue
+            at_least_two = (a & b) | (a & c) | (a & d) | (b & c) | (b & d) | (c & d)
+            danger = warn & at_least_two & ~self.spread(self.clean, y)
+            self.warn[y] = (self.warn[y] | warn) & ~danger
+            if danger:
+                self.danger[y] |= danger
+                new_danger[y] = danger
+        return new_danger
+
+    def infer_danger(self, masks):
+        """Ô đã đi có số percept (breeze + stench) bằng số ô kề chưa đi: các ô đó danger"""
+        fire = {}
+        for y, m in masks.items():
+            src = self.visited[y] & m
+            if not src:
+                continue
+            a, b, c, d = self.directions(self.not_visited, y)
+            # Đếm số ô kề chưa đi bằng cộng bit song song
+            ab_s, ab_c = a ^ b, a & b
+            cd_s, cd_c = c ^ d, c & d
+            ones = ab_s ^ cd_s
+            twos = ab_c ^ cd_c ^ (ab_s & cd_s)
+            fours = ab_c & cd_c
+            exactly_one = ones & ~twos & ~fours
+            exactly_two = ~ones & twos & ~fours
+            one = self.breeze[y] ^ self.stench[y]
+            both = self.breeze[y] & self.stench[y]
+            f = src & ((one & exactly_one) | (both & exactly_two))
+            if f:
+                fire[y] = f
+
+        targets = {}
+        for y, f in fire.items():
+            targets[y] = targets.get(y, 0) | ((f << 1) | (f >> 1)) & self.full
+            if y > 0:
+                targets[y - 1] = targets.get(y - 1, 0) | f
+            if y + 1 < self.N:
+                targets[y + 1] = targets.get(y + 1, 0) | f
+        new_danger = {}
+        for y, t in targets.items():
+            t &= ~self.visited[y]
+            added = t & ~self.danger[y]
+            self.danger[y] |= t
+            self.safe[y] &= ~t
+            self.warn[y] &= ~t
+            if added:
+                new_danger[y] = added
+        return new_danger
+
+    def infer_safe(self, masks):
+        """Ô warn có ô đã đi kề không báo gì thì thành safe"""
+        for y, m in masks.items():
+            w = self.warn[y] & m
+            if w:
+                s = w & self.spread(self.clean, y)
+                self.warn[y] &= ~s
+                self.safe[y] |= s
+
+
+class KBRowView:
+    __slots__ = ('kb', 'y')
+
+    def __init__(self, kb, y):
+        self.kb = kb
+        self.y = y
+
+    def __len__(self):
+        return self.kb.N
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.kb.N:
+            raise IndexError(x)
+        return self.kb.label(x, self.y)
+
+
+class KBView:
+    """Cho phép đọc kb[y][x] -> 'unknown'/'visited'/'safe'/'warn'/'danger' như trước"""
+    __slots__ = ('kb',)
+
+    def __init__(self, kb):
+        self.kb = kb
+
+    def __len__(self):
+        return self.kb.N
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.kb.N:
+            raise IndexError(y)
+        return KBRowView(self.kb, y)
@@ -0,0 +1,215 @@
+"""Suy luận xác suất pit/wumpus cho các ô biên (frontier).
+
+Mỗi ô đã đi có percept breeze (stench) cho ràng buộc "ít nhất một ô kề chưa đi
+có pit (wumpus)" hoặc "không ô kề nào có". Các ô chưa đi nằm trong ràng buộc
+được chia thành các thành phần liên thông độc lập; mỗi thành phần được tính
+chính xác bằng cách liệt kê mô hình, với các ô có cùng tập ràng buộc gộp thành
+một nhóm (chỉ cần liệt kê số ô có pit trong nhóm). Kết quả từng thành phần được
+cache theo tập ràng buộc nên khi agent đi thêm một bước, các thành phần ở xa
+không phải tính lại.
+
+Wumpus di chuyển nên stench cũ có thể sai; ràng buộc mâu thuẫn (không còn ô
+nào để thỏa) bị bỏ qua và xác suất wumpus chỉ nên coi là ước lượng.
+"""
+from math import factorial
+
+from env.percept import BREEZE, STENCH
+
+
+def comb(n, k):
+    return factorial(n) // (factorial(k) * factorial(n - k))
+
+# Số mô hình tối đa (tích của (số ô + 1) qua các nhóm) còn liệt kê chính xác;
+# vượt ngưỡng thì dùng xấp xỉ. 2^14 giữ get_risk ở mức vài chục ms để GUI
+# (gọi trên luồng Tk) không bị đứng
+MAX_EXACT_MODELS = 1 << 14
+
+
+def count_models(group_list, limit=MAX_EXACT_MODELS):
+    """Tích (số ô + 1) của các nhóm, dừng sớm khi đã vượt limit"""
+    total = 1
+    for _, cells in group_list:
+        total *= len(cells) + 1
+        if total > limit:
+            break
+    return total
+
+
+class FrontierInference:
+    def __init__(self, N, prior, percept_bit, max_cache=4096):
+        self.N = N
+        self.prior = prior
+        self.percept_bit = percept_bit  # BREEZE hoặc STENCH (env/percept.py)
+        self.max_cache = max_cache
+        self.cache = {}
+
+    def get_neighbors(self, x, y):
+        for dx, dy in [(-1,0),(1,0),(0,-1),(0,1)]:
+            nx, ny = x+dx, y+dy
+            if 0 <= nx < self.N and 0 <= ny < self.N:
+                yield (nx, ny)
+
+    def probabilities(self, visited, percept_history):
+        """Trả về {ô: xác suất} cho các ô chưa đi kề ô đã đi.
+
+        percept_history: bytearray percept theo ô, chỉ số x * N + y (Agent.percept_history).
+        """
+        clear = set()
+        positive = []
+        frontier = set()
+        for cell in visited:
+            unknown = [c for c in self.get_neighbors(*cell) if c not in visited]
+            frontier.update(unknown)
+            if percept_history[cell[0] * self.N + cell[1]] & self.percept_bit:
+                positive.append(unknown)
+            else:
+                clear.update(unknown)
+
+        result = {c: 0.0 for c in clear}
+        constraints = set()
+        for cells in positive:
+            cells = frozenset(c for c in cells if c not in clear)
+            if cells:  # Ràng buộc rỗng = mâu thuẫn (stench cũ), bỏ qua
+                constraints.add(cells)
+
+        for component in self.components(constraints):
+            result.update(self.solve(component))
+        for c in frontier:
+            result.setdefault(c, self.prior)
+        return result
+
+    def components(self, constraints):
+        """Tách tập ràng buộc thành các nhóm không chung ô nào"""
+        parent = {}
+
+        def find(c):
+            while parent[c] != c:
+                parent[c] = parent[parent[c]]
+                c = parent[c]
+            return c
+
+        for cells in constraints:
+            first = None
+            for c in cells:
+                parent.setdefault(c, c)
+                if first is None:
+                    first = find(c)
+                else:
+                    root = find(c)
+                    if root != first:
+                        parent[root] = first
+        groups = {}
+        for cells in constraints:
+            groups.setdefault(find(next(iter(cells))), []).append(cells)
+        return [frozenset(g) for g in groups.values()]
+
+    def solve(self, component):
+        key = component
+        if key in self.cache:
+            return self.cache[key]
+
+        # Gộp các ô có cùng tập ràng buộc thành một nhóm
+        membership = {}
+        for ci, cells in enumerate(component):
+            for c in cells:
+                membership.setdefault(c, []).append(ci)
+        groups = {}
+        for c, cis in membership.items():
+            groups.setdefault(tuple(cis), []).append(c)
+        group_list = list(groups.items())
+
+        if count_models(group_list) > MAX_EXACT_MODELS:
+            probs = self.approximate(component, membership)
+        else:
+            probs = self.enumerate(len(component), group_list)
+
+        if len(self.cache) >= self.max_cache:
+            self.cache.clear()
+        self.cache[key] = probs
+        return probs
+
+    def enumerate(self, n_constraints, group_list):
+        """Liệt kê chính xác: mỗi nhóm chọn số ô có pit k, trọng số C(n,k) p^k (1-p)^(n-k)"""
+        p = self.prior
+        # Trọng số theo từng k của mỗi nhóm
+        options = []
+        for cis, cells in group_list:
+            n = len(cells)
+            options.append([comb(n, k) * p ** k * (1 - p) ** (n - k) for k in range(n + 1)])
+
+        # Số nhóm chưa gán còn lại cho mỗi ràng buộc, để cắt nhánh sớm
+        remaining = [0] * n_constraints
+        for cis, _ in group_list:
+            for ci in cis:
+                remaining[ci] += 1
+        satisfied = [0] * n_constraints
+        expected = [0.0] * len(group_list)   # tổng trọng số * k của từng nhóm
+        total = [0.0]
+
+        def search(gi, weight, ks):
+            if gi == len(group_list):
+                total[0] += weight
+                for g, k in enumerate(ks):
+                    if k:
+                        expected[g] += weight * k
+                return
+            cis = group_list[gi][0]
+            for ci in cis:
+                remaining[ci] -= 1
+            for k, w in enumerate(options[gi]):
+                if k:
+                    for ci in cis:
+                        satisfied[ci] += 1
+                # Ràng buộc đã hết nhóm để gán mà chưa thỏa thì bỏ nhánh này
+                if all(satisfied[ci] or remaining[ci] for ci in cis):
+                    ks.append(k)
+                    search(gi + 1, weight * w, ks)
+                    ks.pop()
+                if k:
+                    for ci in cis:
+                        satisfied[ci] -= 1
+            for ci in cis:
+                remaining[ci] += 1
+
+        search(0, 1.0, [])
+        probs = {}
+        for g, (cis, cells) in enumerate(group_list):
+            value = expected[g] / (total[0] * len(cells)) if total[0] else self.prior
+            for c in cells:
+                probs[c] = value
+        return probs
+
+    def approximate(self, component, membership):
+        """Xấp xỉ cho thành phần quá lớn: mỗi ràng buộc xét riêng, lấy giá trị lớn nhất"""
+        p = self.prior
+        constraints = list(component)
+        probs = {}
+        if p <= 0:
+            return {c: 0.0 for c in membership}
+        for c, cis in membership.items():
+            best = p
+            for ci in cis:
+                n = len(constraints[ci])
+                best = max(best, p / (1 - (1 - p) ** n))
+            probs[c] = min(best, 1.0)
+        return probs
+
+
+class RiskModel:
+    """Gộp xác suất pit và wumpus cho agent/GUI"""
+
+    def __init__(self, N, p=0.2, K=1):
+        cells = max(N * N - 1, 1)
+        self.pits = FrontierInference(N, p, BREEZE)
+        self.wumpus = FrontierInference(N, min(K / cells, 1.0), STENCH)
+
+    def probabilities(self, visited, percept_history):
+        """{ô: (p_pit, p_wumpus, p_nguy_hiểm)} cho các ô biên"""
+        pit = self.pits.probabilities(visited, percept_history)
+        wum = self.wumpus.probabilities(visited, percept_history)
+        result = {}
+        for c in pit.keys() | wum.keys():
+            pp = pit.get(c, self.pits.prior)
+            pw = wum.get(c, self.wumpus.prior)
+            result[c] = (pp, pw, 1 - (1 - pp) * (1 - pw))
+        return result
@@ -1,8 +1,12 @@
 import random
 
+from env.percept import BUMP, GLITTER, STENCH
+
 class RandomAgent:
-    def __init__(self, N):
+    def __init__(self, N, seed=None, rng=None):
         self.N = N
+        # RNG riêng, không dùng random toàn cục; rng cho phép truyền luồng con đã tách sẵn
+        self.rng = rng if rng is not None else random.Random(seed)
         self.x, self.y = 0, 0  # Start at (0,0)
         self.dir = 1
         self.has_gold = False
@@ -10,8 +14,15 @@ class RandomAgent:
         self.visited = set()
 
     def next_action(self, percepts):
+        # Bump: lần forward trước đụng tường nên thực ra vẫn đứng yên
+        if percepts & BUMP:
+            self.visited.discard((self.x, self.y))
+            dx, dy = [(0,1), (1,0), (0,-1), (-1,0)][self.dir]
+            self.x -= dx
+            self.y -= dy
+
         # Ưu tiên lấy vàng nếu thấy glitter
-        if percepts.get('glitter', False):
+        if percepts & GLITTER:
             self.action_log.append('grab')
             self.has_gold = True
             return 'grab'
@@ -29,11 +40,11 @@ class RandomAgent:
 
         # Random action
         actions = ['forward', 'left', 'right']
-        if percepts.get('stench', False):
+        if percepts & STENCH:
             # Nếu có stench, có thể bắn tên
             actions.append('shoot')
             
-        action = random.choice(actions)
+        action = self.rng.choice(actions)
         self.action_log.append(action)
         return action
 
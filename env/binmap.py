@@ -0,0 +1,116 @@
+"""Định dạng map nhị phân (.wmap), nạp bằng mmap không sao chép.
+
+Bố cục file (little-endian):
+    header  '<4sBBHIII': magic b'WMAP', version, hướng agent, 0, N, agent x, agent y
+    pit     plane_size(N) byte
+    wumpus  plane_size(N) byte
+    gold    plane_size(N) byte
+Mỗi plane giống env/grid.py: bit i = x * N + y. Map 4096x4096 chỉ ~6 MB và
+plane pit/gold được dùng thẳng trên vùng mmap.
+
+    python -m env.binmap testcases/*.json --out-dir testcases/bin
+"""
+import argparse
+import mmap
+import os
+import re
+import struct
+
+from env.grid import new_plane, plane_size, set_bit
+
+MAGIC = b'WMAP'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHIII')
+
+_NONZERO = re.compile(rb'[^\x00]')
+
+
+def is_binary(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def plane_from_cells(N, cells):
+    """Plane từ các chỉ số ô x * N + y"""
+    plane = new_plane(N)
+    for i in cells:
+        set_bit(plane, i)
+    return plane
+
+
+def save(path, N, pit, wumpus, gold, agent_pos=(0, 0), agent_dir=1):
+    """Ghi map từ 3 plane (bytes-like, mỗi plane plane_size(N) byte)"""
+    size = plane_size(N)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, agent_dir, 0, N, agent_pos[0], agent_pos[1]))
+        for plane in (pit, wumpus, gold):
+            if len(plane) != size:
+                raise ValueError(f"Plane has {len(plane)} bytes, expected {size}")
+            f.write(plane)
+
+
+def save_env(path, env):
+    """Ghi map hiện tại của một Environment (vị trí wumpus lúc này)"""
+    wumpus = plane_from_cells(env.N, (x * env.N + y for x, y in env.wumpus_pos))
+    save(path, env.N, env.pit_bits, wumpus, env.gold_bits, env.agent_pos, env.agent_dir)
+
+
+class BinaryMap:
+    """Map đã mmap: pit/wumpus/gold là memoryview trỏ thẳng vào file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            # ACCESS_COPY: ghi vào plane (nếu có) không sửa file trên đĩa
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, self.agent_dir, _, N, ax, ay = HEADER.unpack_from(self.mm)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary map")
+        if version != VERSION:
+            raise ValueError(f"Unsupported binary map version {version}")
+        size = plane_size(N)
+        if len(self.mm) < HEADER.size + 3 * size:
+            raise ValueError(f"{path} is truncated")
+        self.N = N
+        self.agent_pos = (ax, ay)
+        view = memoryview(self.mm)
+        start = HEADER.size
+        self.pit = view[start:start + size]
+        self.wumpus = view[start + size:start + 2 * size]
+        self.gold = view[start + 2 * size:start + 3 * size]
+
+    def wumpus_positions(self):
+        """Vị trí wumpus, chỉ duyệt các byte khác 0 của plane"""
+        N = self.N
+        cells = []
+        for m in _NONZERO.finditer(self.wumpus):
+            bi = m.start()
+            b = self.wumpus[bi]
+            for k in range(8):
+                if b >> k & 1:
+                    cells.append(divmod((bi << 3) + k, N))
+        return cells
+
+
+def convert(src, dst):
+    """Đổi file map JSON (dạng list các hàng hoặc object) sang .wmap"""
+    from env.environment import Environment
+    save_env(dst, Environment(mapfile=src))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert JSON maps to the binary .wmap format")
+    parser.add_argument('maps', nargs='+', help="file map JSON")
+    parser.add_argument('--out-dir', default=None, help="mặc định: cùng thư mục với file JSON")
+    args = parser.parse_args(argv)
+
+    for src in args.maps:
+        name = os.path.splitext(os.path.basename(src))[0] + '.wmap'
+        out_dir = args.out_dir or os.path.dirname(src)
+        os.makedirs(out_dir or '.', exist_ok=True)
+        dst = os.path.join(out_dir, name)
+        convert(src, dst)
+        print(f"{src} -> {dst}")
+
+
+if __name__ == '__main__':
+    main()
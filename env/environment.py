@@ -1,19 +1,27 @@
 import json
 import random
 
-class Cell:
-    def __init__(self):
-        self.has_pit = False
-        self.has_wumpus = False
-        self.has_gold = False
+from env import binmap
+from env.percept import BREEZE, BUMP, GLITTER, SCREAM, STENCH
+from env.rng import spawn
+from env.grid import GridView, get_bit, set_bit, new_plane, neighbor_plane
 
 class Environment:
-    def __init__(self, N=4, K=1, p=0.2, seed=42, mapfile=None):
+    # Phần không đổi trong một episode: clone() dùng chung, không sao chép
+    STATIC_FIELDS = ('N', 'K', 'p', 'mapfile', 'seed', 'pit_bits', 'gold_bits', 'breeze_bits',
+                     'wumpus_move_interval')
+
+    def __init__(self, N=4, K=1, p=0.2, seed=42, mapfile=None, mapdata=None):
         self.N = N
         self.K = K
         self.p = p
         self.mapfile = mapfile
+        self.seed = seed
+        # RNG riêng của env: map sinh bằng Random(seed) (giữ nguyên các map cũ),
+        # wumpus di chuyển dùng luồng con riêng
+        self.wumpus_rng = spawn(seed, 'wumpus')
         self.agent_alive = True
+        self.agent_escaped = False  # Agent đã climb ra khỏi hang ở (0,0)
         self.gold_grabbed = False
 
         # Thêm scoring system
@@ -28,61 +36,122 @@ class Environment:
         self.arrow_in_flight = False
         self.arrow_target = None
         self.arrow_direction = None
-        
-        self.map = [[Cell() for _ in range(N)] for _ in range(N)]
+        self.scream_this_turn = False  # wumpus vừa bị bắn chết, báo scream ở lượt sau
+        self.bump_this_turn = False  # forward vừa đụng tường, báo bump ở lượt sau
+
+        # Map lưu dạng bit plane (xem env/grid.py), self.map chỉ là view
+        self.pit_bits = new_plane(N)
+        self.gold_bits = new_plane(N)
+        self.breeze_bits = new_plane(N)
+        self.stench_count = {}  # (x, y) -> số wumpus còn sống ở ô kề
 
         self.agent_pos = (0, 0)
         self.agent_dir = 1  # 0: up, 1: right, 2: down, 3: left
+        # Bảng wumpus: id -> vị trí, id -> còn sống, vị trí -> id
+        self.wumpus_pos = []
         self.wumpus_alive = []
+        self.wumpus_at = {}
+        # Gắn runner.profiler.Profiler để đo thời gian từng phase (None: tắt)
+        self.profiler = None
         if mapfile:
             self.load_from_json(mapfile)
+        elif mapdata is not None:
+            self.load_map(mapdata)  # map đã đọc sẵn, vd. từ env.mapgen
         else:
             self.random_map(seed=seed)
-        # Wumpus alive flags (support multi-wumpus)
-        if not self.wumpus_alive:
-            # Count wumpus
-            cnt = sum(self.map[i][j].has_wumpus for i in range(N) for j in range(N))
-            self.wumpus_alive = [True] * cnt
+
+    @property
+    def map(self):
+        return GridView(self)
+
+    def init_planes(self, wumpus_positions):
+        """Dựng breeze, bảng wumpus và stench sau khi đã có pit/gold"""
+        self.breeze_bits = neighbor_plane(self.pit_bits, self.N)
+        # Đánh id cho wumpus theo thứ tự quét map, tất cả còn sống
+        self.wumpus_pos = sorted(set(map(tuple, wumpus_positions)))
+        self.wumpus_alive = [True] * len(self.wumpus_pos)
+        self.wumpus_at = {pos: idx for idx, pos in enumerate(self.wumpus_pos)}
+        self.stench_count = {}
+        for x, y in self.wumpus_pos:
+            self.add_stench(x, y, 1)
+
+    def add_stench(self, x, y, delta):
+        """Cập nhật stench quanh (x, y) khi wumpus xuất hiện/di chuyển/chết"""
+        for nx, ny in self.get_neighbors(x, y):
+            cnt = self.stench_count.get((nx, ny), 0) + delta
+            if cnt:
+                self.stench_count[(nx, ny)] = cnt
+            else:
+                del self.stench_count[(nx, ny)]
 
     def random_map(self, seed=42):
-        random.seed(seed)
-        self.map = [[Cell() for _ in range(self.N)] for _ in range(self.N)]
+        rng = random.Random(seed)
+        N = self.N
+        self.pit_bits = new_plane(N)
+        self.gold_bits = new_plane(N)
         self.agent_pos = (0, 0)
         self.agent_dir = 1
         # Random pit
-        for i in range(self.N):
-            for j in range(self.N):
+        pits = 0
+        for i in range(N):
+            for j in range(N):
                 if (i, j) == (0, 0): continue
-                if random.random() < self.p:
-                    self.map[i][j].has_pit = True
+                if rng.random() < self.p:
+                    set_bit(self.pit_bits, i * N + j)
+                    pits += 1
+        # Thiếu ô trống thì các vòng thử dưới đây không bao giờ dừng
+        free = N * N - 1 - pits
+        if free < self.K + 1:
+            raise ValueError(f"Not enough free cells: need {self.K + 1}, have {free}")
         # Wumpus
-        wumpus_cnt = 0
-        while wumpus_cnt < self.K:
-            x, y = random.randint(0, self.N-1), random.randint(0, self.N-1)
-            if (x, y) != (0, 0) and not self.map[x][y].has_pit and not self.map[x][y].has_wumpus:
-                self.map[x][y].has_wumpus = True
-                wumpus_cnt += 1
+        wumpus = set()
+        while len(wumpus) < self.K:
+            x, y = rng.randint(0, N-1), rng.randint(0, N-1)
+            if (x, y) != (0, 0) and not get_bit(self.pit_bits, x * N + y):
+                wumpus.add((x, y))
         # Gold
         while True:
-            x, y = random.randint(0, self.N-1), random.randint(0, self.N-1)
-            if (x, y) != (0, 0) and not self.map[x][y].has_pit and not self.map[x][y].has_wumpus and not self.map[x][y].has_gold:
-                self.map[x][y].has_gold = True
+            x, y = rng.randint(0, N-1), rng.randint(0, N-1)
+            if (x, y) != (0, 0) and not get_bit(self.pit_bits, x * N + y) and (x, y) not in wumpus:
+                set_bit(self.gold_bits, x * N + y)
                 break
-        # Wumpus alive
-        self.wumpus_alive = [True] * self.K
+        self.init_planes(wumpus)
 
     def load_from_json(self, filename):
+        # File .wmap (env/binmap.py) nhận ra theo magic, không theo đuôi file
+        if binmap.is_binary(filename):
+            self.load_binary(filename)
+            return
         with open(filename, 'r') as f:
             data = json.load(f)
+        self.load_map(data)
+
+    def load_binary(self, filename):
+        """Nạp map .wmap qua mmap: pit/gold dùng thẳng vùng nhớ của file"""
+        bm = binmap.BinaryMap(filename)
+        self.N = bm.N
+        self.pit_bits = bm.pit
+        self.gold_bits = bm.gold
+        self.agent_pos = bm.agent_pos
+        self.agent_dir = bm.agent_dir
+        self.init_planes(bm.wumpus_positions())
+
+    def load_map(self, data):
+        """Nạp map dạng list các hàng hoặc dạng object agent/wumpus/pit/gold"""
+        wumpus = []
         if isinstance(data, list):
             self.N = len(data)
-            self.map = [[Cell() for _ in range(self.N)] for _ in range(self.N)]
+            self.pit_bits = new_plane(self.N)
+            self.gold_bits = new_plane(self.N)
             for i in range(self.N):
                 for j in range(self.N):
                     c = data[i][j]
-                    self.map[i][j].has_pit = c.get("pit", False)
-                    self.map[i][j].has_wumpus = c.get("wumpus", False)
-                    self.map[i][j].has_gold = c.get("gold", False)
+                    if c.get("pit", False):
+                        set_bit(self.pit_bits, i * self.N + j)
+                    if c.get("wumpus", False):
+                        wumpus.append((i, j))
+                    if c.get("gold", False):
+                        set_bit(self.gold_bits, i * self.N + j)
             self.agent_pos = (0, 0)
             self.agent_dir = 1
         else:
@@ -92,49 +161,101 @@ class Environment:
                 coords.extend(data.get(k, []))
             if "agent" in data and "pos" in data["agent"]:
                 coords.append(data["agent"]["pos"])
-            self.N = max(max(coord) for coord in coords) + 1 if coords else 4
-            self.map = [[Cell() for _ in range(self.N)] for _ in range(self.N)]
+            if "N" in data:
+                self.N = data["N"]
+            else:
+                self.N = max(max(coord) for coord in coords) + 1 if coords else 4
+            self.pit_bits = new_plane(self.N)
+            self.gold_bits = new_plane(self.N)
             # Agent
             self.agent_pos = tuple(data["agent"]["pos"])
             self.agent_dir = data["agent"].get("dir", 1)
             # Wumpus
-            for xy in data.get("wumpus", []):
-                self.map[xy[0]][xy[1]].has_wumpus = True
+            wumpus = data.get("wumpus", [])
             # Pit
             for xy in data.get("pit", []):
-                self.map[xy[0]][xy[1]].has_pit = True
+                set_bit(self.pit_bits, xy[0] * self.N + xy[1])
             # Gold
             for xy in data.get("gold", []):
-                self.map[xy[0]][xy[1]].has_gold = True
-            # Wumpus alive (nếu nhiều wumpus)
-            self.wumpus_alive = [True] * len(data.get("wumpus", []))
+                set_bit(self.gold_bits, xy[0] * self.N + xy[1])
+        self.init_planes(wumpus)
+
+    def has_pit(self, x, y):
+        return get_bit(self.pit_bits, x * self.N + y) == 1
+
+    def has_gold(self, x, y):
+        return get_bit(self.gold_bits, x * self.N + y) == 1
 
     def get_percepts(self):
+        """Percept ở ô hiện tại dạng số nguyên bit (env/percept.py)"""
+        prof = self.profiler
+        if prof:
+            t0 = prof.start()
         x, y = self.agent_pos
-        percepts = {
-            "breeze": False,
-            "stench": False,
-            "glitter": self.map[x][y].has_gold and not self.gold_grabbed,
-            "scream": False  # Thêm scream percept
-        }
+        percepts = 0
+        if self.has_gold(x, y) and not self.gold_grabbed:
+            percepts |= GLITTER
         # Kiểm tra arrow hit (turn sau khi bắn)
         if self.arrow_in_flight:
             self.check_arrow_hit()
             self.arrow_in_flight = False
         
-        # Xử lý scream percept
-        if hasattr(self, 'scream_this_turn') and self.scream_this_turn:
-            percepts["scream"] = True
+        # Xử lý scream/bump của hành động trước
+        if self.scream_this_turn:
+            percepts |= SCREAM
             self.scream_this_turn = False
+        if self.bump_this_turn:
+            percepts |= BUMP
+            self.bump_this_turn = False
             
-        # Breeze: có pit kề
-        for nx, ny in self.get_neighbors(x, y):
-            if self.map[nx][ny].has_pit:
-                percepts["breeze"] = True
-            if self.map[nx][ny].has_wumpus and self.wumpus_alive[self.wumpus_idx_at(nx, ny)]:
-                percepts["stench"] = True
+        # Breeze/stench đã tính sẵn, chỉ cần đọc
+        if get_bit(self.breeze_bits, x * self.N + y):
+            percepts |= BREEZE
+        if (x, y) in self.stench_count:
+            percepts |= STENCH
+        if prof:
+            prof.stop('env.get_percepts', t0)
         return percepts
 
+    def snapshot(self):
+        """Trạng thái động của env dạng tuple (map tĩnh không nằm trong đó).
+
+        Gồm cả trạng thái RNG dùng cho wumpus di chuyển, để restore() rồi chạy
+        tiếp cho ra đúng các bước như lần chạy gốc.
+        """
+        return (self.agent_pos, self.agent_dir, self.agent_alive, self.agent_escaped,
+                self.gold_grabbed, self.score, self.agent_arrows, self.wumpus_move_counter,
+                self.arrow_in_flight, self.arrow_target, self.arrow_direction,
+                self.scream_this_turn, self.bump_this_turn,
+                tuple(self.wumpus_pos), tuple(self.wumpus_alive),
+                self.wumpus_rng.getstate())
+
+    def restore(self, snap):
+        """Đưa env về trạng thái đã lấy bằng snapshot() (cùng map)"""
+        (self.agent_pos, self.agent_dir, self.agent_alive, self.agent_escaped,
+         self.gold_grabbed, self.score, self.agent_arrows, self.wumpus_move_counter,
+         self.arrow_in_flight, self.arrow_target, self.arrow_direction,
+         self.scream_this_turn, self.bump_this_turn, wumpus_pos, wumpus_alive, rng_state) = snap
+        self.wumpus_pos = list(wumpus_pos)
+        self.wumpus_alive = list(wumpus_alive)
+        # Xác wumpus vẫn chiếm ô nên wumpus_at gồm cả con đã chết
+        self.wumpus_at = {pos: idx for idx, pos in enumerate(wumpus_pos)}
+        self.stench_count = {}
+        for pos, alive in zip(wumpus_pos, wumpus_alive):
+            if alive:
+                self.add_stench(pos[0], pos[1], 1)
+        self.wumpus_rng.setstate(rng_state)
+
+    def clone(self):
+        """Bản sao độc lập của env; map tĩnh (các bit plane) dùng chung, không sao chép"""
+        env = Environment.__new__(Environment)
+        for name in self.STATIC_FIELDS:
+            setattr(env, name, getattr(self, name))
+        env.profiler = None
+        env.wumpus_rng = random.Random()
+        env.restore(self.snapshot())
+        return env
+
     def get_neighbors(self, x, y):
         for dx, dy in [(-1,0),(1,0),(0,-1),(0,1)]:
             nx, ny = x+dx, y+dy
@@ -142,18 +263,15 @@ class Environment:
                 yield (nx, ny)
 
     def wumpus_idx_at(self, x, y):
-        # Trả về thứ tự wumpus tại vị trí (x, y)
-        idx = 0
-        for i in range(self.N):
-            for j in range(self.N):
-                if self.map[i][j].has_wumpus:
-                    if (i, j) == (x, y):
-                        return idx
-                    idx += 1
-        return 0
+        # Trả về id wumpus tại vị trí (x, y), None nếu không có
+        return self.wumpus_at.get((x, y))
+
+    def wumpus_alive_at(self, x, y):
+        idx = self.wumpus_at.get((x, y))
+        return idx is not None and self.wumpus_alive[idx]
 
     def step(self, action):
-        if not self.agent_alive:
+        if not self.agent_alive or self.agent_escaped:
             return
         if action == "forward":
             self.score -= 1
@@ -162,12 +280,14 @@ class Environment:
             if 0 <= nx < self.N and 0 <= ny < self.N:
                 self.agent_pos = (nx, ny)
                 # Kiểm tra pit/wumpus
-                if self.map[nx][ny].has_pit:
+                if self.has_pit(nx, ny):
                     self.agent_alive = False
                     self.score -= 1000  # Die penalty
-                elif self.map[nx][ny].has_wumpus and self.wumpus_alive[self.wumpus_idx_at(nx, ny)]:
+                elif self.wumpus_alive_at(nx, ny):
                     self.agent_alive = False
                     self.score -= 1000  # Die penalty
+            else:
+                self.bump_this_turn = True
         elif action == "left":
             self.score -= 1
             self.agent_dir = (self.agent_dir - 1) % 4
@@ -177,12 +297,15 @@ class Environment:
         elif action == "grab":
             self.score -= 1
             x, y = self.agent_pos
-            if self.map[x][y].has_gold:
+            # Gold chỉ được thưởng một lần
+            if self.has_gold(x, y) and not self.gold_grabbed:
                 self.gold_grabbed = True
                 self.score += 1000  # Gold bonus
         elif action == "climb":
             self.score -= 1
-            pass
+            # Climb ở cửa hang (0,0) thì kết thúc episode
+            if self.agent_pos == (0, 0):
+                self.agent_escaped = True
         elif action == "shoot":
             # Xử lý bắn tên
             if self.agent_arrows > 0:
@@ -198,6 +321,8 @@ class Environment:
                     self.arrow_in_flight = True
                     self.arrow_target = (arrow_x, arrow_y)
                     self.arrow_direction = self.agent_dir
+            else:
+                self.score -= 1  # Hết tên: tốn một lượt như hành động thường
         
         # Di chuyển Wumpus sau mỗi bước
         self.move_wumpus()
@@ -206,46 +331,57 @@ class Environment:
         """Kiểm tra mũi tên có trúng Wumpus không"""
         if not self.arrow_target:
             return
-            
+        prof = self.profiler
+        if prof:
+            t0 = prof.start()
+
         x, y = self.arrow_target
-        if self.map[x][y].has_wumpus and self.wumpus_alive[self.wumpus_idx_at(x, y)]:
-            # Wumpus bị giết
-            self.wumpus_alive[self.wumpus_idx_at(x, y)] = False
+        if self.wumpus_alive_at(x, y):
+            # Wumpus bị giết (xác vẫn nằm ở ô đó)
+            self.wumpus_alive[self.wumpus_at[(x, y)]] = False
+            self.add_stench(x, y, -1)
             # Tạo scream percept cho turn tiếp theo
             self.scream_this_turn = True
             self.score -= 10  # Trừ điểm cho việc bắn tên
+        if prof:
+            prof.stop('env.check_arrow_hit', t0)
 
     def move_wumpus(self):
         """Di chuyển Wumpus ngẫu nhiên"""
         self.wumpus_move_counter += 1
         if self.wumpus_move_counter >= self.wumpus_move_interval:
             self.wumpus_move_counter = 0
-            
-            # Tìm tất cả Wumpus còn sống
-            for i in range(self.N):
-                for j in range(self.N):
-                    if self.map[i][j].has_wumpus and self.wumpus_alive[self.wumpus_idx_at(i, j)]:
-                        # Di chuyển Wumpus này
-                        self.move_single_wumpus(i, j)
+            prof = self.profiler
+            if prof:
+                t0 = prof.start()
+
+            # Mỗi Wumpus còn sống di chuyển đúng một lần, theo thứ tự id
+            for idx, alive in enumerate(self.wumpus_alive):
+                if alive:
+                    self.move_single_wumpus(*self.wumpus_pos[idx])
+            if prof:
+                prof.stop('env.move_wumpus', t0)
 
     def move_single_wumpus(self, x, y):
         """Di chuyển một Wumpus từ vị trí (x,y)"""
-        import random
-        
         # Tìm các ô kề có thể di chuyển
         possible_moves = []
         for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
             nx, ny = x + dx, y + dy
             if 0 <= nx < self.N and 0 <= ny < self.N:
-                # Wumpus có thể đi vào ô có gold
-                if not self.map[nx][ny].has_pit:
+                # Wumpus có thể đi vào ô có gold, nhưng không vào pit
+                # hay ô đã có wumpus khác (kể cả xác)
+                if not self.has_pit(nx, ny) and (nx, ny) not in self.wumpus_at:
                     possible_moves.append((nx, ny))
         
         if possible_moves:
             # Chọn ngẫu nhiên một ô để di chuyển
-            new_x, new_y = random.choice(possible_moves)
+            new_x, new_y = self.wumpus_rng.choice(possible_moves)
             
-            # Di chuyển Wumpus
-            self.map[x][y].has_wumpus = False
-            self.map[new_x][new_y].has_wumpus = True
+            # Di chuyển Wumpus, giữ nguyên id
+            idx = self.wumpus_at.pop((x, y))
+            self.wumpus_at[(new_x, new_y)] = idx
+            self.wumpus_pos[idx] = (new_x, new_y)
+            self.add_stench(x, y, -1)
+            self.add_stench(new_x, new_y, 1)
 
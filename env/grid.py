@@ -0,0 +1,120 @@
+"""Map dạng bit plane: mỗi thuộc tính (pit, gold, breeze, ...) là 1 bit / ô.
+
+Chỉ số ô là x*N + y (cùng thứ tự với map[x][y]), bit thứ i nằm ở
+byte i // 8, vị trí i % 8 (little-endian, giống int.from_bytes(..., 'little')).
+"""
+
+
+def plane_size(N):
+    return (N * N + 7) // 8
+
+
+def new_plane(N):
+    return bytearray(plane_size(N))
+
+
+def get_bit(plane, i):
+    return (plane[i >> 3] >> (i & 7)) & 1
+
+
+def set_bit(plane, i):
+    plane[i >> 3] |= 1 << (i & 7)
+
+
+def clear_bit(plane, i):
+    plane[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+
+def iter_bits(plane):
+    """Duyệt chỉ số các bit bật, bỏ qua nhanh các byte rỗng"""
+    for bi, b in enumerate(plane):
+        if b:
+            base = bi << 3
+            for k in range(8):
+                if (b >> k) & 1:
+                    yield base + k
+
+
+def _repeat(pattern, period, count):
+    """Lặp pattern (int) count lần, mỗi lần cách nhau period bit"""
+    result, shift = 0, 0
+    block, width = pattern, period
+    while count:
+        if count & 1:
+            result |= block << shift
+            shift += width
+        count >>= 1
+        block |= block << width
+        width *= 2
+    return result
+
+
+def neighbor_plane(plane, N):
+    """Plane các ô có ít nhất một ô kề (4 hướng) bật bit trong plane.
+
+    Tính bằng phép dịch trên số nguyên lớn nên chi phí tỉ lệ với số byte,
+    không phải số ô (dùng cho breeze từ pit).
+    """
+    total = N * N
+    full = (1 << total) - 1
+    bits = int.from_bytes(plane, 'little') & full
+    first_y = _repeat(1, N, N)          # các ô y == 0
+    last_y = first_y << (N - 1)         # các ô y == N-1
+    spread = (bits << N) | (bits >> N)                  # x +- 1
+    spread |= (bits >> 1) & ~last_y                     # ô (x, y) nhìn thấy (x, y+1)
+    spread |= (bits << 1) & ~first_y                    # ô (x, y) nhìn thấy (x, y-1)
+    return bytearray((spread & full).to_bytes(plane_size(N), 'little'))
+
+
+class CellView:
+    """Một ô của map, đọc trực tiếp từ các plane của Environment"""
+    __slots__ = ('env', 'x', 'y')
+
+    def __init__(self, env, x, y):
+        self.env = env
+        self.x = x
+        self.y = y
+
+    @property
+    def has_pit(self):
+        return bool(get_bit(self.env.pit_bits, self.x * self.env.N + self.y))
+
+    @property
+    def has_gold(self):
+        return bool(get_bit(self.env.gold_bits, self.x * self.env.N + self.y))
+
+    @property
+    def has_wumpus(self):
+        return (self.x, self.y) in self.env.wumpus_at
+
+
+class _ColumnView:
+    __slots__ = ('env', 'x')
+
+    def __init__(self, env, x):
+        self.env = env
+        self.x = x
+
+    def __len__(self):
+        return self.env.N
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.env.N:
+            raise IndexError(y)
+        return CellView(self.env, self.x, y)
+
+
+class GridView:
+    """Cho phép truy cập kiểu cũ env.map[x][y].has_pit mà không tạo N*N object"""
+    __slots__ = ('env',)
+
+    def __init__(self, env):
+        self.env = env
+
+    def __len__(self):
+        return self.env.N
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.env.N:
+            raise IndexError(x)
+        return _ColumnView(self.env, x)
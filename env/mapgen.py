@@ -0,0 +1,182 @@
+"""Sinh map ngẫu nhiên số lượng lớn, không dùng vòng lặp thử-loại.
+
+Ô được đánh số i = x * N + y như bit plane trong env/grid.py. Pit: mỗi ô (trừ
+(0,0)) là pit với xác suất p, lấy mẫu bằng cách nhảy khoảng cách hình học giữa
+hai pit nên chỉ tốn O(số pit). Wumpus và gold: chọn các thứ hạng khác nhau
+trong các ô trống (không lặp, không thử lại) rồi đổi thứ hạng ra chỉ số ô.
+solvable=True thì gold được chọn trong mọi ô trừ (0,0), dọn pit trên một
+đường bậc thang ngẫu nhiên từ (0,0) tới gold, sau đó mới chọn wumpus trong
+các ô còn trống (thiếu ô thì bỏ bớt vài pit); nên luôn có đường không pit
+tới gold, kể cả khi p cao (các ô trên đường đó vì vậy ít pit hơn p một chút).
+
+Mỗi map dùng random.Random(seed) riêng, không đụng tới random toàn cục.
+
+    python -m env.mapgen --count 1000 --N 64 --K 2 --p 0.2 --out testcases/gen
+    python -m env.mapgen --count 1000 --N 64 --format jsonl --out maps.jsonl
+    python -m env.mapgen --count 10 --N 4096 --format wmap --out maps/big
+"""
+import argparse
+import json
+import os
+from bisect import bisect_right
+from math import log
+import random
+
+from env import binmap
+
+
+def sample_pits(N, p, rng):
+    """Chỉ số các ô có pit (tăng dần), mỗi ô trừ (0,0) độc lập với xác suất p"""
+    total = N * N
+    if p <= 0:
+        return []
+    if p >= 1:
+        return list(range(1, total))
+    pits = []
+    scale = 1.0 / log(1.0 - p)
+    i = 0
+    while True:
+        # Số ô không pit trước pit tiếp theo ~ phân phối hình học
+        i += int(log(1.0 - rng.random()) * scale) + 1
+        if i >= total:
+            return pits
+        pits.append(i)
+
+
+def sample_free(N, blocked, count, rng):
+    """count ô khác nhau ngoài blocked (list tăng dần), chọn đều không lặp"""
+    free = N * N - len(blocked)
+    if count > free:
+        raise ValueError(f"Not enough free cells: need {count}, have {free}")
+    # Số ô trống đứng trước blocked[j] là blocked[j] - j (không giảm)
+    free_before = [b - j for j, b in enumerate(blocked)]
+    return [r + bisect_right(free_before, r) for r in rng.sample(range(free), count)]
+
+
+def staircase(N, gold, rng):
+    """Các ô trên một đường bậc thang ngẫu nhiên từ (0,0) tới gold"""
+    gx, gy = divmod(gold, N)
+    moves = [N] * gx + [1] * gy
+    rng.shuffle(moves)
+    cells = {0}
+    i = 0
+    for step in moves:
+        i += step
+        cells.add(i)
+    return cells
+
+
+def sample_map(N, K, p, seed, solvable=True):
+    """(pits, wumpus, gold) dạng chỉ số ô cho một map"""
+    rng = random.Random(seed)
+    pits = sample_pits(N, p, rng)
+    if not solvable:
+        *wumpus, gold = sample_free(N, [0] + pits, K + 1, rng)
+        return pits, wumpus, gold
+    # Gold chọn trong mọi ô trừ (0,0), dọn pit trên đường tới gold rồi mới chọn
+    # wumpus trong các ô còn trống, nên p cao cũng không thiếu ô
+    if N * N < K + 2:
+        raise ValueError(f"Not enough free cells: need {K + 1}, have {N * N - 1}")
+    gold = rng.randrange(1, N * N)
+    path = staircase(N, gold, rng)
+    pits = [i for i in pits if i not in path]
+    short = K - (N * N - 2 - len(pits))
+    if short > 0:
+        # p gần 1: bỏ thêm vài pit ngẫu nhiên để đủ chỗ cho wumpus
+        drop = set(rng.sample(pits, short))
+        pits = [i for i in pits if i not in drop]
+    wumpus = sample_free(N, sorted([0, gold] + pits), K, rng)
+    return pits, wumpus, gold
+
+
+def generate_map(N, K=1, p=0.2, seed=0, solvable=True):
+    """Map dạng object như testcases/*.json, kèm N và seed"""
+    pits, wumpus, gold = sample_map(N, K, p, seed, solvable)
+    return {
+        'N': N,
+        'seed': seed,
+        'agent': {'pos': [0, 0], 'dir': 1},
+        'wumpus': [list(divmod(i, N)) for i in sorted(wumpus)],
+        'pit': [list(divmod(i, N)) for i in pits],
+        'gold': [list(divmod(gold, N))],
+    }
+
+
+def _write_json(spec):
+    path, N, K, p, seed, solvable = spec
+    with open(path, 'w') as f:
+        json.dump(generate_map(N, K, p, seed, solvable), f)
+    return path
+
+
+def _write_wmap(spec):
+    path, N, K, p, seed, solvable = spec
+    pits, wumpus, gold = sample_map(N, K, p, seed, solvable)
+    binmap.save(path, N, binmap.plane_from_cells(N, pits),
+                binmap.plane_from_cells(N, wumpus), binmap.plane_from_cells(N, [gold]))
+    return path
+
+
+def _jsonl_lines(spec):
+    N, K, p, seeds, solvable = spec
+    return ''.join(json.dumps(generate_map(N, K, p, s, solvable), separators=(',', ':')) + '\n'
+                   for s in seeds)
+
+
+def _pool_map(fn, tasks, workers):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(tasks) <= 1:
+        return map(fn, tasks)
+    from concurrent.futures import ProcessPoolExecutor
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        return list(pool.map(fn, tasks))
+    finally:
+        pool.shutdown()
+
+
+def write_maps(out, seeds, N, K=1, p=0.2, solvable=True, fmt='json', workers=None, chunk=64):
+    """Sinh map cho từng seed, song song trên nhiều process.
+
+    fmt='json'/'wmap': mỗi map một file out/map_<seed>.json (.wmap là định dạng
+    nhị phân của env/binmap.py); fmt='jsonl': mọi map vào một file out, mỗi
+    dòng một map, đúng thứ tự seeds.
+    """
+    seeds = list(seeds)
+    if fmt in ('json', 'wmap'):
+        os.makedirs(out, exist_ok=True)
+        writer = _write_json if fmt == 'json' else _write_wmap
+        tasks = [(os.path.join(out, f"map_{s}.{fmt}"), N, K, p, s, solvable) for s in seeds]
+        return list(_pool_map(writer, tasks, workers))
+    if fmt == 'jsonl':
+        tasks = [(N, K, p, seeds[i:i + chunk], solvable) for i in range(0, len(seeds), chunk)]
+        with open(out, 'w') as f:
+            for text in _pool_map(_jsonl_lines, tasks, workers):
+                f.write(text)
+        return [out]
+    raise ValueError(f"Unknown format: {fmt!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Wumpus World maps")
+    parser.add_argument('--count', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0, help="seed của map đầu tiên")
+    parser.add_argument('--N', type=int, default=4)
+    parser.add_argument('--K', type=int, default=1)
+    parser.add_argument('--p', type=float, default=0.2)
+    parser.add_argument('--no-solvable', action='store_true',
+                        help="không dọn đường không pit tới gold")
+    parser.add_argument('--format', choices=('json', 'jsonl', 'wmap'), default='json')
+    parser.add_argument('--out', required=True, help="thư mục (json, wmap) hoặc file (jsonl)")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    seeds = range(args.seed, args.seed + args.count)
+    files = write_maps(args.out, seeds, args.N, args.K, args.p, not args.no_solvable,
+                       args.format, args.workers)
+    print(f"Wrote {args.count} maps to {len(files)} file(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,29 @@
-class Percept:
-    def __init__(self, stench, breeze, glitter, bump, scream):
-        self.stench = stench
-        self.breeze = breeze
-        self.glitter = glitter
-        self.bump = bump
-        self.scream = scream
+"""Percept dạng số nguyên 5 bit, mỗi cảm nhận một bit.
+
+Environment.get_percepts trả về số này thay cho dict nên mỗi bước không phải
+tạo object mới; agent đọc bằng phép &, ví dụ `percepts & BREEZE`. Agent lưu
+percept theo ô trong một bytearray, bit SEEN đánh dấu ô đã có percept.
+"""
+STENCH = 1
+BREEZE = 2
+GLITTER = 4
+BUMP = 8
+SCREAM = 16
+SEEN = 128  # Chỉ dùng trong percept_history của agent
+
+NAMES = ('stench', 'breeze', 'glitter', 'bump', 'scream')
+BITS = (STENCH, BREEZE, GLITTER, BUMP, SCREAM)
+
+
+def from_dict(percepts):
+    """{'breeze': True, ...} -> số nguyên (cho code cũ còn dùng dict)"""
+    return sum(bit for name, bit in zip(NAMES, BITS) if percepts.get(name, False))
+
+
+def to_dict(percepts):
+    return {name: bool(percepts & bit) for name, bit in zip(NAMES, BITS)}
+
+
+def describe(percepts):
+    """'stench, breeze' hoặc 'none', để in log"""
+    return ', '.join(name for name, bit in zip(NAMES, BITS) if percepts & bit) or 'none'
@@ -0,0 +1,16 @@
+"""Bộ sinh số ngẫu nhiên riêng cho từng Environment/agent.
+
+Không dùng random toàn cục: mỗi đối tượng giữ random.Random của mình nên nhiều
+env chạy xen kẽ (thread, asyncio, cùng process) vẫn cho kết quả y hệt nhau.
+Từ một seed có thể tách các luồng con độc lập theo tên (sinh map, wumpus di
+chuyển, ...), luồng này dùng nhiều hay ít số cũng không làm lệch luồng kia.
+"""
+import random
+
+
+def spawn(seed, stream):
+    """Luồng con tên stream của seed; seed None thì lấy ngẫu nhiên từ hệ điều hành"""
+    if seed is None:
+        return random.Random()
+    # Seed dạng str được băm (sha512) nên ổn định giữa các lần chạy/máy
+    return random.Random(f"{seed}/{stream}")
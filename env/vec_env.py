@@ -0,0 +1,208 @@
+"""Chạy B world độc lập cùng lúc bằng mảng NumPy.
+
+Luật chơi giống Environment.step/get_percepts (kể cả wumpus di chuyển định kỳ
+và mũi tên xử lý ở lượt sau), nhưng mỗi bước chỉ là vài phép toán trên mảng
+thay vì B lần gọi Python.
+
+    venv = VecEnvironment(N=8, K=2, p=0.2)
+    percepts = venv.reset(range(1024))
+    percepts, rewards, dones = venv.step(actions)   # actions: mảng int theo ACTIONS
+
+percepts là mảng uint8[B], mỗi phần tử là percept dạng bit như env/percept.py.
+"""
+import numpy as np
+
+import config
+from env.environment import Environment
+from env.percept import BREEZE, BUMP, GLITTER, SCREAM, STENCH
+
+ACTIONS = ('forward', 'left', 'right', 'grab', 'climb', 'shoot')
+FORWARD, LEFT, RIGHT, GRAB, CLIMB, SHOOT = range(len(ACTIONS))
+
+# 0: up, 1: right, 2: down, 3: left (giống Environment.agent_dir)
+DIR_DELTA = np.array([(0, 1), (1, 0), (0, -1), (-1, 0)])
+# Thứ tự ô kề khi wumpus chọn hướng đi (giống move_single_wumpus)
+WUMPUS_MOVES = np.array([(-1, 0), (1, 0), (0, -1), (0, 1)])
+
+
+def _unpack(plane, N):
+    bits = np.unpackbits(np.frombuffer(bytes(plane), dtype=np.uint8), bitorder='little')
+    return bits[:N * N].reshape(N, N).astype(bool)
+
+
+def _neighbors_any(grid):
+    """grid[B,N,N] -> ô có ít nhất một ô kề bật"""
+    out = np.zeros_like(grid)
+    out[:, 1:, :] |= grid[:, :-1, :]
+    out[:, :-1, :] |= grid[:, 1:, :]
+    out[:, :, 1:] |= grid[:, :, :-1]
+    out[:, :, :-1] |= grid[:, :, 1:]
+    return out
+
+
+class VecEnvironment:
+    def __init__(self, N=4, K=1, p=0.2, wumpus_move_interval=config.WUMPUS_MOVE_INTERVAL):
+        self.N = N
+        self.K = K
+        self.p = p
+        self.wumpus_move_interval = wumpus_move_interval
+        self.B = 0
+
+    def reset(self, seeds):
+        """Sinh lại B = len(seeds) world (cùng map với Environment(seed=...))"""
+        seeds = list(seeds)
+        B, N = len(seeds), self.N
+        envs = [Environment(N=N, K=self.K, p=self.p, seed=s) for s in seeds]
+        K = max([len(e.wumpus_pos) for e in envs] + [1])
+        self.B = B
+        self.rng = np.random.default_rng(seeds)
+
+        self.pit = np.stack([_unpack(e.pit_bits, N) for e in envs])
+        self.gold = np.stack([_unpack(e.gold_bits, N) for e in envs])
+        self.breeze = _neighbors_any(self.pit)
+
+        # Wumpus: pos -1 và exists False cho phần đệm khi số wumpus khác nhau
+        self.wumpus_pos = np.full((B, K, 2), -1, dtype=np.int64)
+        self.wumpus_exists = np.zeros((B, K), dtype=bool)
+        for b, e in enumerate(envs):
+            n = len(e.wumpus_pos)
+            if n:
+                self.wumpus_pos[b, :n] = e.wumpus_pos
+                self.wumpus_exists[b, :n] = True
+        self.wumpus_alive = self.wumpus_exists.copy()
+
+        self.agent_pos = np.array([e.agent_pos for e in envs], dtype=np.int64).reshape(B, 2)
+        self.agent_dir = np.array([e.agent_dir for e in envs], dtype=np.int64)
+        self.agent_alive = np.ones(B, dtype=bool)
+        self.agent_escaped = np.zeros(B, dtype=bool)
+        self.gold_grabbed = np.zeros(B, dtype=bool)
+        self.agent_arrows = np.full(B, config.DEFAULT_ARROWS, dtype=np.int64)
+        self.score = np.zeros(B, dtype=np.int64)
+        self.wumpus_move_counter = np.zeros(B, dtype=np.int64)
+        self.arrow_in_flight = np.zeros(B, dtype=bool)
+        self.arrow_target = np.zeros((B, 2), dtype=np.int64)
+        self.scream_this_turn = np.zeros(B, dtype=bool)
+        self.bump_this_turn = np.zeros(B, dtype=bool)
+        return self._percepts(np.ones(B, dtype=bool))
+
+    @property
+    def dones(self):
+        return ~self.agent_alive | self.agent_escaped
+
+    def _alive_wumpus_at(self, pos):
+        """pos[B,2] -> (mask[B,K] wumpus sống đúng ô pos)"""
+        return (self.wumpus_alive
+                & (self.wumpus_pos[:, :, 0] == pos[:, None, 0])
+                & (self.wumpus_pos[:, :, 1] == pos[:, None, 1]))
+
+    def _in_bounds(self, pos):
+        return ((pos >= 0) & (pos < self.N)).all(axis=-1)
+
+    def step(self, actions):
+        """Thực hiện actions[B]; trả về (percepts, rewards, dones)"""
+        actions = np.asarray(actions)
+        active = ~self.dones
+        before = self.score.copy()
+        idx = np.arange(self.B)
+        delta = DIR_DELTA[self.agent_dir]
+
+        # Mọi hành động trừ shoot (còn tên) tốn 1 điểm
+        costly = (active & (actions >= 0) & (actions < len(ACTIONS))
+                  & ~((actions == SHOOT) & (self.agent_arrows > 0)))
+        self.score[costly] += config.SCORE_ACTION
+
+        # forward
+        fwd = active & (actions == FORWARD)
+        target = self.agent_pos + delta
+        moved = fwd & self._in_bounds(target)
+        self.bump_this_turn |= fwd & ~moved
+        self.agent_pos[moved] = target[moved]
+        x, y = self.agent_pos[:, 0], self.agent_pos[:, 1]
+        died = moved & (self.pit[idx, x, y] | self._alive_wumpus_at(self.agent_pos).any(axis=1))
+        self.agent_alive[died] = False
+        self.score[died] += config.SCORE_DIE
+
+        # left / right
+        self.agent_dir[active & (actions == LEFT)] -= 1
+        self.agent_dir[active & (actions == RIGHT)] += 1
+        self.agent_dir %= 4
+
+        # grab (giống Environment.step: có vàng ở ô hiện tại, chỉ cộng lần đầu)
+        got = active & (actions == GRAB) & self.gold[idx, x, y] & ~self.gold_grabbed
+        self.gold_grabbed[got] = True
+        self.score[got] += config.SCORE_GOLD
+
+        # climb ở (0,0) kết thúc episode
+        climb = active & (actions == CLIMB) & (x == 0) & (y == 0)
+        self.agent_escaped[climb] = True
+
+        # shoot: mũi tên bay vào ô phía trước, xử lý ở lượt sau
+        shoot = active & (actions == SHOOT) & (self.agent_arrows > 0)
+        self.agent_arrows[shoot] -= 1
+        self.score[shoot] += config.SCORE_SHOOT
+        flying = shoot & self._in_bounds(target)
+        self.arrow_in_flight[flying] = True
+        self.arrow_target[flying] = target[flying]
+
+        self._move_wumpus(active)
+        percepts = self._percepts(~self.dones)
+        return percepts, self.score - before, self.dones
+
+    def _move_wumpus(self, active):
+        self.wumpus_move_counter[active] += 1
+        move_now = active & (self.wumpus_move_counter >= self.wumpus_move_interval)
+        self.wumpus_move_counter[move_now] = 0
+        if not move_now.any():
+            return
+        idx = np.arange(self.B)
+        N = self.N
+        for k in range(self.wumpus_pos.shape[1]):
+            movers = move_now & self.wumpus_alive[:, k]
+            if not movers.any():
+                continue
+            cand = self.wumpus_pos[:, k, None, :] + WUMPUS_MOVES[None, :, :]   # [B,4,2]
+            valid = self._in_bounds(cand)
+            cx = np.clip(cand[..., 0], 0, N - 1)
+            cy = np.clip(cand[..., 1], 0, N - 1)
+            valid &= ~self.pit[idx[:, None], cx, cy]
+            # Không đi vào ô đã có wumpus khác (kể cả xác)
+            occupied = (self.wumpus_exists[:, None, :]
+                        & (self.wumpus_pos[:, None, :, 0] == cand[..., 0, None])
+                        & (self.wumpus_pos[:, None, :, 1] == cand[..., 1, None])).any(axis=2)
+            valid &= ~occupied
+            count = valid.sum(axis=1)
+            movers &= count > 0
+            # Chọn ngẫu nhiên đều trong các ô hợp lệ
+            pick = (self.rng.random(self.B) * np.maximum(count, 1)).astype(np.int64)
+            choice = ((np.cumsum(valid, axis=1) - 1 == pick[:, None]) & valid).argmax(axis=1)
+            new = cand[idx, choice]
+            self.wumpus_pos[movers, k] = new[movers]
+
+    def _percepts(self, live):
+        """Giống get_percepts: xử lý mũi tên rồi ghép các bit percept"""
+        idx = np.arange(self.B)
+        x, y = self.agent_pos[:, 0], self.agent_pos[:, 1]
+
+        resolve = live & self.arrow_in_flight
+        if resolve.any():
+            hit = self._alive_wumpus_at(self.arrow_target) & resolve[:, None]
+            killed = hit.any(axis=1)
+            self.wumpus_alive &= ~hit
+            self.scream_this_turn |= killed
+            self.score[killed] += config.SCORE_SHOOT
+            self.arrow_in_flight[resolve] = False
+
+        scream = live & self.scream_this_turn
+        self.scream_this_turn[scream] = False
+        bump = live & self.bump_this_turn
+        self.bump_this_turn[bump] = False
+
+        dist = (np.abs(self.wumpus_pos - self.agent_pos[:, None, :])).sum(axis=2)
+        stench = (self.wumpus_alive & (dist == 1)).any(axis=1)
+        percepts = np.zeros(self.B, dtype=np.uint8)
+        percepts[stench] |= STENCH
+        percepts[self.breeze[idx, x, y]] |= BREEZE
+        percepts[self.gold[idx, x, y] & ~self.gold_grabbed] |= GLITTER
+        percepts[bump] |= BUMP
+        percepts[scream] |= SCREAM
+        return percepts
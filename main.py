@@ -1,27 +1,74 @@
 # main.py
+"""Điểm vào chung. Mỗi lệnh chỉ import module nó cần: không có lệnh thì mở GUI
+(cần tkinter), các lệnh còn lại không đụng tới tkinter nên chạy được trên máy
+không có màn hình.
+
+    python main.py                                  # GUI
+    python main.py gui --N 8 --K 2 --seed 7          # GUI, map random
+    python main.py run --maps testcases/map1.json   # chạy map
+    python main.py run --seeds 0:1000 --N 8         # chạy dãy seed
+    python main.py bench --sizes 8,16
+    python main.py gen --count 100 --N 16 --out maps
+"""
+import sys
+
+# lệnh -> (module có hàm main(argv), mô tả)
+COMMANDS = {
+    'gui': ('main', "mở giao diện Tk (mặc định khi không có lệnh)"),
+    'run': ('runner.headless', "chạy episode không GUI theo map hoặc dãy seed"),
+    'bench': ('runner.benchmark', "đo thời gian các hàm chính"),
+    'gen': ('env.mapgen', "sinh map ngẫu nhiên"),
+    'convert': ('env.binmap', "đổi map JSON sang .wmap"),
+    'compare': ('runner.compare', "so sánh hai agent đến khi đủ chắc"),
+    'sweep': ('runner.sweep', "quét lưới N, K, p có cache"),
+    'oracle': ('runner.oracle', "điểm tốt nhất có thể trên từng map"),
+    'replay': ('runner.replay', "xem bản ghi episode"),
+    'serve': ('runner.server', "server env cho agent ở process khác"),
+}
+
+
+def usage():
+    lines = ["usage: python main.py [command] [args...]", "", "commands:"]
+    lines += [f"  {name:9} {desc}" for name, (_, desc) in COMMANDS.items()]
+    lines.append("\n`python main.py <command> -h` cho tham số của từng lệnh")
+    return '\n'.join(lines)
+
+
+def gui(argv):
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='main.py gui', description="Wumpus World GUI. Có --N/--K/--p/--seed thì mở map "
+        "random sinh từ các tham số đó, không thì mở testcases/map1.json")
+    parser.add_argument('--N', type=int, default=None, help="mặc định 4")
+    parser.add_argument('--K', type=int, default=None, help="mặc định 1")
+    parser.add_argument('--p', type=float, default=None, help="mặc định 0.2")
+    parser.add_argument('--seed', type=int, default=None, help="mặc định 42")
+    args = parser.parse_args(argv)
+    params = {'N': 4, 'K': 1, 'p': 0.2, 'seed': 42}
+    given = {name: value for name, value in vars(args).items() if value is not None}
+    params.update(given)
 
-if __name__ == '__main__':
-    # Muốn GUI thì chạy:
     from visual.gui import WumpusGUI
-    app = WumpusGUI(N=4, K=2, p=0.2, seed=42)
+    app = WumpusGUI(random_map=bool(given), **params)
     app.mainloop()
 
-    # Nếu muốn console test:
-    # from env.environment import Environment
-    # from agent.agent import Agent
-    # from agent.random_agent import RandomAgent
-    # 
-    # # Test Intelligent Agent
-    # env = Environment(N=4, K=1, p=0.2, seed=42)
-    # agent = Agent(N=4)
-    # 
-    # # Test Random Agent
-    # env2 = Environment(N=4, K=1, p=0.2, seed=42)
-    # random_agent = RandomAgent(N=4)
-    # 
-    # # So sánh performance
-    # print("Testing Intelligent Agent...")
-    # # ... test logic
-    # 
-    # print("Testing Random Agent...")
-    # # ... test logic
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0].startswith('-') and argv[0] not in ('-h', '--help'):
+        return gui(argv)
+    command, rest = argv[0], argv[1:]
+    if command in ('-h', '--help', 'help'):
+        print(usage())
+        return 0
+    if command == 'gui':
+        return gui(rest)
+    if command not in COMMANDS:
+        print(f"unknown command: {command}\n\n{usage()}", file=sys.stderr)
+        return 2
+    from importlib import import_module
+    return import_module(COMMANDS[command][0]).main(rest)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""Benchmark các đường nóng của env, agent và tìm đường.
+
+Đo thời gian mỗi lần gọi (µs) cho get_percepts, step, move_wumpus,
+Agent.update_percepts, Agent.find_path và cả episode trên lưới kích thước map,
+số wumpus và mật độ pit. Kết quả ghi ra JSON để làm baseline, và so sánh với
+baseline cũ: case nào chậm hơn quá ngưỡng thì báo regression (exit code 1).
+
+    python -m runner.benchmark --save bench/baseline.json
+    python -m runner.benchmark --baseline bench/baseline.json --threshold 0.2
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from env.environment import Environment
+from agent.agent import Agent
+from env.percept import BREEZE, STENCH
+from runner.headless import run_episode
+
+DEFAULT_SIZES = (4, 8, 16, 32, 64, 128, 256, 512)
+DEFAULT_WUMPUS = (1, 4)
+DEFAULT_PITS = (0.1, 0.2)
+
+
+def measure(setup, min_time=0.05, repeat=3):
+    """Thời gian/lần tốt nhất (µs) trong repeat lần đo.
+
+    Lần đầu gọi tới khi đủ min_time để chọn số lần gọi; các lần sau gọi đúng
+    số lần đó trên trạng thái mới từ setup(), để benchmark có trạng thái
+    (agent tích lũy kb, ...) đo cùng một chuỗi thao tác mỗi lần.
+    """
+    number = None
+    best = None
+    for _ in range(repeat):
+        fn = setup()
+        n = 0
+        start = time.perf_counter()
+        while True:
+            fn()
+            n += 1
+            elapsed = time.perf_counter() - start
+            if n == number or (number is None and elapsed >= min_time):
+                break
+        number = n
+        per_call = elapsed / n * 1e6
+        best = per_call if best is None else min(best, per_call)
+    return best, number
+
+
+# --- Các benchmark: nhận (N, K, p, seed), trả về hàm làm một thao tác ---------
+
+def bench_get_percepts(N, K, p, seed):
+    env = Environment(N=N, K=K, p=p, seed=seed)
+    return env.get_percepts
+
+
+def bench_step(N, K, p, seed):
+    env = Environment(N=N, K=K, p=p, seed=seed)
+    # Chỉ xoay để agent không chết, vẫn chạy move_wumpus mỗi bước
+    actions = ['left', 'right']
+    i = [0]
+
+    def run():
+        i[0] ^= 1
+        env.step(actions[i[0]])
+    return run
+
+
+def bench_move_wumpus(N, K, p, seed):
+    env = Environment(N=N, K=K, p=p, seed=seed)
+
+    def run():
+        # Ép đúng lượt wumpus di chuyển
+        env.wumpus_move_counter = env.wumpus_move_interval - 1
+        env.move_wumpus()
+    return run
+
+
+def _random_walk_percepts(N, p, seed):
+    """Chuỗi (x, y, percepts) đi ngẫu nhiên trên map để nuôi update_percepts"""
+    rng = random.Random(seed)
+    x = y = 0
+    while True:
+        breeze = BREEZE if rng.random() < p else 0
+        yield x, y, breeze | (STENCH if rng.random() < 0.05 else 0)
+        dx, dy = rng.choice([(0, 1), (1, 0), (0, -1), (-1, 0)])
+        if 0 <= x + dx < N and 0 <= y + dy < N:
+            x, y = x + dx, y + dy
+
+
+def bench_update_percepts(N, K, p, seed):
+    agent = Agent(N=N, p=p, K=K)
+    walk = _random_walk_percepts(N, p, seed)
+
+    def run():
+        agent.x, agent.y, percepts = next(walk)
+        agent.update_percepts(percepts)
+    return run
+
+
+def bench_find_path(N, K, p, seed):
+    agent = Agent(N=N, p=p, K=K)
+    walk = _random_walk_percepts(N, p, seed)
+    # Cho agent biết một phần map trước khi tìm đường
+    for _ in range(4 * N):
+        agent.x, agent.y, percepts = next(walk)
+        agent.update_percepts(percepts)
+    known = sorted(agent.visited)
+    rng = random.Random(seed)
+
+    def run():
+        # Đường của agent chỉ đi qua ô đã đi/safe nên chọn cả hai đầu trong các ô đã đi
+        agent.x, agent.y = rng.choice(known)
+        agent.dir = rng.randrange(4)
+        agent.find_path(rng.choice(known))
+    return run
+
+
+def make_bench_episode(max_steps):
+    def bench_episode(N, K, p, seed):
+        seeds = iter(range(seed, seed + 10 ** 9))
+
+        def run():
+            run_episode(agent='agent', seed=next(seeds), N=N, K=K, p=p, max_steps=max_steps)
+        return run
+    return bench_episode
+
+
+BENCHMARKS = {
+    'env.get_percepts': bench_get_percepts,
+    'env.step': bench_step,
+    'env.move_wumpus': bench_move_wumpus,
+    'agent.update_percepts': bench_update_percepts,
+    'agent.find_path': bench_find_path,
+    'episode': None,  # dựng theo --episode-steps
+}
+
+
+def case_name(bench, N, K, p):
+    return f"{bench}[N={N},K={K},p={p}]"
+
+
+def run_suite(sizes=DEFAULT_SIZES, wumpus=DEFAULT_WUMPUS, pits=DEFAULT_PITS,
+              only=None, seed=42, min_time=0.05, repeat=3, episode_steps=5000, log=None):
+    results = {}
+    for name, factory in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        if factory is None:
+            factory = make_bench_episode(episode_steps)
+        for N in sizes:
+            for K in wumpus:
+                if K >= N * N:
+                    continue
+                for p in pits:
+                    setup = lambda: factory(N, K, p, seed)
+                    us, calls = measure(setup, min_time, repeat)
+                    key = case_name(name, N, K, p)
+                    results[key] = {'bench': name, 'N': N, 'K': K, 'p': p,
+                                    'us_per_call': us, 'calls': calls}
+                    if log:
+                        log(f"{key:50s} {us:12.2f} us/call")
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.2):
+    """So với baseline: danh sách (case, cũ, mới, tỉ lệ) chậm hơn quá threshold"""
+    regressions = []
+    old = baseline.get('results', {})
+    for key, res in current.get('results', {}).items():
+        if key not in old:
+            continue
+        before, after = old[key]['us_per_call'], res['us_per_call']
+        ratio = after / before if before else float('inf')
+        if ratio > 1 + threshold:
+            regressions.append((key, before, after, ratio))
+    return regressions
+
+
+def _parse_list(text, cast):
+    """'8,16,32' -> (8, 16, 32) với cast=int"""
+    return tuple(cast(v) for v in text.split(',') if v)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Wumpus World hot paths")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)))
+    parser.add_argument('--wumpus', default=','.join(map(str, DEFAULT_WUMPUS)))
+    parser.add_argument('--pits', default=','.join(map(str, DEFAULT_PITS)))
+    parser.add_argument('--only', help="chỉ chạy các benchmark này, cách nhau bởi dấu phẩy: "
+                        + ', '.join(BENCHMARKS))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--min-time', type=float, default=0.05, help="giây tối thiểu mỗi lần đo")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--episode-steps', type=int, default=5000)
+    parser.add_argument('--save', help="ghi kết quả ra file JSON (baseline)")
+    parser.add_argument('--baseline', help="so sánh với file baseline JSON")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="chậm hơn baseline quá tỉ lệ này thì báo regression")
+    args = parser.parse_args(argv)
+
+    only = set(args.only.split(',')) if args.only else None
+    current = run_suite(_parse_list(args.sizes, int), _parse_list(args.wumpus, int),
+                        _parse_list(args.pits, float),
+                        only=only, seed=args.seed, min_time=args.min_time, repeat=args.repeat,
+                        episode_steps=args.episode_steps, log=print)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        for key, before, after, ratio in regressions:
+            print(f"REGRESSION {key}: {before:.2f} -> {after:.2f} us/call (x{ratio:.2f})")
+        if regressions:
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
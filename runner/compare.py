@@ -0,0 +1,184 @@
+"""So sánh hai agent bằng các episode ghép cặp, dừng ngay khi kết luận đủ chắc.
+
+Mỗi seed được chạy cho cả hai agent (cùng map, cùng wumpus), nên chênh lệch
+từng cặp loại bỏ được độ khó khác nhau giữa các map. Chạy theo từng lô seed
+liên tiếp; sau mỗi lô tính khoảng tin cậy của chênh lệch điểm trung bình (xấp
+xỉ chuẩn) và chênh lệch tỉ lệ thắng (thắng = lấy gold và thoát ra; khoảng
+Agresti-Min cho cặp, không co về 0 khi chưa thấy trận thắng nào), dừng khi
+đã đủ min_episodes và một khoảng đã hẹp hơn độ rộng yêu cầu, hoặc hết
+max_episodes.
+
+    python -m runner.compare --a agent --b random --N 6 --win-width 0.02
+    python -m runner.compare --N 8 --K 2 --score-width 20 --batch 2000
+"""
+import argparse
+import json
+import math
+import time
+
+from runner.headless import AGENTS, run_episodes, seed_specs
+
+
+def z_value(confidence):
+    """z sao cho P(|Z| < z) = confidence với Z chuẩn tắc (chia đôi trên erf)"""
+    lo, hi = 0.0, 10.0
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if math.erf(mid / math.sqrt(2)) < confidence:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+class RunningStats:
+    """Trung bình và phương sai cộng dồn (Welford)"""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def half_width(self, z):
+        """Nửa độ rộng khoảng tin cậy của trung bình"""
+        if self.n < 2:
+            return math.inf
+        return z * math.sqrt(self.m2 / (self.n - 1) / self.n)
+
+    def interval(self, z):
+        h = self.half_width(z)
+        return [self.mean - h, self.mean + h]
+
+
+class PairedWins:
+    """Chênh lệch tỉ lệ thắng ghép cặp, khoảng Agresti-Min (thêm 0.5 vào mỗi ô bảng 2x2)"""
+
+    def __init__(self):
+        self.n = 0
+        self.a_only = 0  # a thắng, b thua
+        self.b_only = 0  # b thắng, a thua
+
+    def add(self, a_won, b_won):
+        self.n += 1
+        self.a_only += a_won and not b_won
+        self.b_only += b_won and not a_won
+
+    @property
+    def mean(self):
+        return (self.a_only - self.b_only) / self.n if self.n else 0.0
+
+    def adjusted(self):
+        n, a, b = self.n + 2, self.a_only + 0.5, self.b_only + 0.5
+        diff = (a - b) / n
+        return diff, math.sqrt(max((a + b) / n - diff * diff, 0.0) / n)
+
+    def half_width(self, z):
+        return z * self.adjusted()[1]
+
+    def interval(self, z):
+        diff, se = self.adjusted()
+        return [max(diff - z * se, -1.0), min(diff + z * se, 1.0)]
+
+
+def won(result):
+    return result['outcome'] == 'escaped' and result['gold']
+
+
+def compare(a='agent', b='random', N=4, K=1, p=0.2, score_width=None, win_width=None,
+            confidence=0.95, batch=500, max_episodes=100000, seed=0, max_steps=None,
+            workers=None, min_episodes=200):
+    """Chạy cặp episode theo lô tới khi khoảng tin cậy đủ hẹp.
+
+    score_width/win_width: độ rộng (cả hai phía) mong muốn của khoảng tin cậy
+    cho chênh lệch điểm trung bình a - b và chênh lệch tỉ lệ thắng a - b;
+    dừng khi một trong các khoảng được yêu cầu đạt, nhưng không trước
+    min_episodes cặp (vài lô đầu có thể tình cờ không có phương sai). Trả về
+    dict tổng kết, gồm số episode (cặp) đã cần.
+    """
+    if score_width is None and win_width is None:
+        raise ValueError("Need score_width or win_width")
+    z = z_value(confidence)
+    score_diff, win_diff = RunningStats(), PairedWins()
+    totals = {'a_score': 0, 'b_score': 0, 'a_wins': 0, 'b_wins': 0}
+    start = time.perf_counter()
+    stopped_by = 'max_episodes'
+    n = 0
+    while n < max_episodes:
+        seeds = range(seed + n, seed + min(n + batch, max_episodes))
+        # Cả hai agent trong cùng một lần gọi để chia đều cho các worker
+        results = run_episodes(seed_specs(a, seeds, N, K, p, max_steps)
+                               + seed_specs(b, seeds, N, K, p, max_steps), workers=workers)
+        for ra, rb in zip(results[:len(seeds)], results[len(seeds):]):
+            score_diff.add(ra['score'] - rb['score'])
+            win_diff.add(won(ra), won(rb))
+            totals['a_score'] += ra['score']
+            totals['b_score'] += rb['score']
+            totals['a_wins'] += won(ra)
+            totals['b_wins'] += won(rb)
+        n += len(seeds)
+        if n < min_episodes:
+            continue
+        if score_width is not None and 2 * score_diff.half_width(z) <= score_width:
+            stopped_by = 'score'
+            break
+        if win_width is not None and 2 * win_diff.half_width(z) <= win_width:
+            stopped_by = 'win'
+            break
+
+    return {
+        'a': a,
+        'b': b,
+        'N': N, 'K': K, 'p': p,
+        'episodes': n,
+        'stopped_by': stopped_by,
+        'confidence': confidence,
+        'a_mean_score': totals['a_score'] / n,
+        'b_mean_score': totals['b_score'] / n,
+        'score_diff': score_diff.mean,
+        'score_diff_ci': score_diff.interval(z),
+        'a_win_rate': totals['a_wins'] / n,
+        'b_win_rate': totals['b_wins'] / n,
+        'win_diff': win_diff.mean,
+        'win_diff_ci': win_diff.interval(z),
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Adaptive paired comparison of two agents")
+    parser.add_argument('--a', choices=AGENTS, default='agent')
+    parser.add_argument('--b', choices=AGENTS, default='random')
+    parser.add_argument('--N', type=int, default=4)
+    parser.add_argument('--K', type=int, default=1)
+    parser.add_argument('--p', type=float, default=0.2)
+    parser.add_argument('--score-width', type=float, default=None,
+                        help="độ rộng khoảng tin cậy mong muốn cho chênh lệch điểm")
+    parser.add_argument('--win-width', type=float, default=None,
+                        help="độ rộng khoảng tin cậy mong muốn cho chênh lệch tỉ lệ thắng")
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--batch', type=int, default=500, help="số seed mỗi lô")
+    parser.add_argument('--min-episodes', type=int, default=200,
+                        help="số cặp tối thiểu trước khi được dừng")
+    parser.add_argument('--max-episodes', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0, help="seed đầu tiên")
+    parser.add_argument('--max-steps', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    win_width = args.win_width
+    if args.score_width is None and win_width is None:
+        win_width = 0.05
+    summary = compare(args.a, args.b, args.N, args.K, args.p, args.score_width, win_width,
+                      args.confidence, args.batch, args.max_episodes, args.seed,
+                      args.max_steps, args.workers, args.min_episodes)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
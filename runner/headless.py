@@ -0,0 +1,244 @@
+"""Chạy episode không cần GUI, song song trên nhiều process.
+
+Ví dụ:
+    python -m runner.headless --agent agent --seeds 0:1000 --N 8 --K 2 --p 0.2
+    python -m runner.headless --agent random --maps testcases/*.json
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+from env.environment import Environment
+from env.rng import spawn
+from runner.profiler import Profiler, to_csv
+
+AGENTS = ('agent', 'random')
+
+
+def make_agent(name, N, p=0.2, K=1, seed=None):
+    """Tạo agent theo tên ('agent' hoặc 'random'); seed cho agent có dùng RNG"""
+    if name == 'agent':
+        from agent.agent import Agent
+        return Agent(N=N, p=p, K=K)
+    if name == 'random':
+        from agent.random_agent import RandomAgent
+        return RandomAgent(N=N, rng=spawn(seed, 'agent'))
+    raise ValueError(f"Unknown agent: {name!r} (expected one of {AGENTS})")
+
+
+def default_max_steps(N):
+    # Đủ để agent đi hết map nhiều lần, tránh episode chạy vô hạn
+    return 20 * N * N + 100
+
+
+def run_episode(agent='agent', seed=42, mapfile=None, N=4, K=1, p=0.2, max_steps=None,
+                profile=False, record=None, record_interval=None, remote=None):
+    """Chạy một episode, trả về dict kết quả (score, steps, outcome, ...).
+
+    profile=True: thêm 'profile' là thời gian/số lần gọi từng phase (runner.profiler).
+    record: đường dẫn file .wrec để ghi lại episode (runner.replay).
+    remote: địa chỉ runner.server, env chạy trên server thay vì trong process này.
+    """
+    start = time.perf_counter()
+    client = None
+    if remote:
+        if record:
+            raise ValueError("Cannot record an episode played on a remote server")
+        from runner.server import Client, parse_address
+        client = Client(parse_address(remote))
+        env = client.make_env(N=N, K=K, p=p, seed=seed,
+                              mapfile=os.path.abspath(mapfile) if mapfile else None)
+    else:
+        env = Environment(N=N, K=K, p=p, seed=seed, mapfile=mapfile)
+    bot = make_agent(agent, env.N, env.p, len(env.wumpus_pos), seed=seed)
+    prof = None
+    if profile:
+        prof = Profiler()
+        env.profiler = bot.profiler = prof
+    recorder = None
+    if record:
+        from runner.replay import Recorder, DEFAULT_INTERVAL
+        recorder = Recorder(env, bot, record_interval or DEFAULT_INTERVAL,
+                            dict(agent=agent, seed=None if mapfile else seed, mapfile=mapfile,
+                                 K=len(env.wumpus_pos), p=env.p))
+    if max_steps is None:
+        max_steps = default_max_steps(env.N)
+
+    steps = 0
+    while steps < max_steps and env.agent_alive and not env.agent_escaped:
+        percepts = env.get_percepts()
+        action = bot.next_action(percepts)
+        env.step(action)
+        bot.update_agent_state(action, percepts)
+        if recorder:
+            recorder.record(action)
+        steps += 1
+    if client:
+        client.close()
+
+    if not env.agent_alive:
+        outcome = 'dead'
+    elif env.agent_escaped:
+        outcome = 'escaped'
+    else:
+        outcome = 'timeout'
+    result = {
+        'agent': agent,
+        'seed': None if mapfile else seed,
+        'mapfile': mapfile,
+        'N': env.N,
+        'score': env.score,
+        'steps': steps,
+        'outcome': outcome,
+        'gold': env.gold_grabbed,
+        'wall_time': time.perf_counter() - start,
+    }
+    if prof:
+        result['profile'] = prof.as_dict()
+    if recorder:
+        recorder.save(record, score=env.score, outcome=outcome)
+    return result
+
+
+def _run_spec(spec):
+    return run_episode(**spec)
+
+
+def _record_path(record_dir, name):
+    return os.path.join(record_dir, name + '.wrec') if record_dir else None
+
+
+def seed_specs(agent, seeds, N=4, K=1, p=0.2, max_steps=None, profile=False, record_dir=None,
+               remote=None):
+    """Danh sách episode cho một dãy seed"""
+    return [dict(agent=agent, seed=s, N=N, K=K, p=p, max_steps=max_steps, profile=profile,
+                 record=_record_path(record_dir, f"seed_{s}"), remote=remote)
+            for s in seeds]
+
+
+def map_specs(agent, mapfiles, max_steps=None, profile=False, record_dir=None, remote=None):
+    """Danh sách episode cho các file map (testcases/*.json)"""
+    return [dict(agent=agent, mapfile=f, max_steps=max_steps, profile=profile,
+                 record=_record_path(record_dir, os.path.splitext(os.path.basename(f))[0]),
+                 remote=remote)
+            for f in mapfiles]
+
+
+def run_episodes(specs, workers=None, chunksize=None):
+    """Chạy nhiều episode song song, kết quả giữ đúng thứ tự specs"""
+    specs = list(specs)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(specs) <= 1:
+        return [_run_spec(s) for s in specs]
+    if chunksize is None:
+        # Gom nhiều episode nhỏ vào một task để giảm chi phí IPC
+        chunksize = max(1, len(specs) // (workers * 8))
+    # Import muộn: job một process (--workers 1) không phải nạp multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_spec, specs, chunksize=chunksize))
+
+
+def add_oracle(results, specs, workers=None):
+    """Gắn điểm của runner.oracle (điểm tốt nhất có thể trên cùng map) vào từng kết quả"""
+    from runner.oracle import solve_specs
+    for r, o in zip(results, solve_specs(specs, workers=workers)):
+        r['oracle'] = o['score']
+    return results
+
+
+def summarize(results):
+    """Tổng hợp điểm trung bình, tỉ lệ thoát/chết và thời gian"""
+    n = len(results)
+    if n == 0:
+        return {'episodes': 0}
+    outcomes = {}
+    for r in results:
+        outcomes[r['outcome']] = outcomes.get(r['outcome'], 0) + 1
+    summary = {
+        'episodes': n,
+        'mean_score': sum(r['score'] for r in results) / n,
+        'mean_steps': sum(r['steps'] for r in results) / n,
+        'gold_rate': sum(r['gold'] for r in results) / n,
+        'outcomes': outcomes,
+        'total_wall_time': sum(r['wall_time'] for r in results),
+    }
+    solved = [r for r in results if r.get('oracle') is not None]
+    if solved:
+        # Chỉ tính các map oracle thoát được; fraction = điểm agent / điểm oracle
+        oracle = sum(r['oracle'] for r in solved) / len(solved)
+        summary['oracle_mean_score'] = oracle
+        summary['oracle_fraction'] = (sum(r['score'] for r in solved) / len(solved) / oracle
+                                      if oracle > 0 else None)
+    return summary
+
+
+def parse_seed_range(text):
+    """'0:1000' -> range(0, 1000); '7' -> [7]"""
+    if ':' in text:
+        lo, hi = text.split(':', 1)
+        return range(int(lo), int(hi))
+    return [int(text)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Wumpus World episode runner")
+    parser.add_argument('--agent', choices=AGENTS, default='agent')
+    parser.add_argument('--seeds', default='0:100', help="seed hoặc khoảng seed 'a:b'")
+    parser.add_argument('--maps', nargs='*', help="file map JSON (bỏ qua --seeds)")
+    parser.add_argument('--N', type=int, default=4)
+    parser.add_argument('--K', type=int, default=1)
+    parser.add_argument('--p', type=float, default=0.2)
+    parser.add_argument('--max-steps', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', help="ghi kết quả từng episode ra file JSON")
+    parser.add_argument('--profile-out',
+                        help="đo từng phase và ghi profile từng episode ra file .json hoặc .csv")
+    parser.add_argument('--record-dir', help="ghi lại từng episode thành file .wrec trong thư mục này")
+    parser.add_argument('--oracle', action='store_true',
+                        help="so với điểm tốt nhất có thể trên từng map (runner.oracle)")
+    parser.add_argument('--remote', help="chạy env trên runner.server ở địa chỉ này "
+                                         "(đường dẫn Unix socket hoặc host:port)")
+    args = parser.parse_args(argv)
+
+    profile = bool(args.profile_out)
+    if args.record_dir:
+        os.makedirs(args.record_dir, exist_ok=True)
+    if args.maps:
+        files = sorted(f for pattern in args.maps for f in glob.glob(pattern))
+        specs = map_specs(args.agent, files, args.max_steps, profile, args.record_dir, args.remote)
+    else:
+        specs = seed_specs(args.agent, parse_seed_range(args.seeds), args.N, args.K, args.p,
+                           args.max_steps, profile, args.record_dir, args.remote)
+
+    start = time.perf_counter()
+    results = run_episodes(specs, workers=args.workers)
+    if args.oracle:
+        add_oracle(results, specs, workers=args.workers)
+    summary = summarize(results)
+    summary['elapsed'] = time.perf_counter() - start
+    print(json.dumps(summary, indent=2))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f)
+    if args.profile_out:
+        write_profiles(args.profile_out, results)
+
+
+def write_profiles(path, results):
+    """Ghi profile từng episode: .csv một dòng mỗi (episode, phase), còn lại JSON"""
+    if path.endswith('.csv'):
+        rows = [(r, r['profile']) for r in results]
+        with open(path, 'w', newline='') as f:
+            f.write(to_csv(rows, extra=('agent', 'seed', 'mapfile', 'N')))
+    else:
+        keys = ('agent', 'seed', 'mapfile', 'N', 'steps', 'wall_time', 'profile')
+        with open(path, 'w') as f:
+            json.dump([{k: r[k] for k in keys} for r in results], f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
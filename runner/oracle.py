@@ -0,0 +1,314 @@
+"""Oracle biết toàn bộ map: điểm tốt nhất đạt được trên một map, làm cận trên cho agent.
+
+Oracle biết pit, gold, vị trí wumpus và cả luồng RNG wumpus của env (env/rng.py)
+nên biết trước wumpus sẽ đi đâu. Tìm kiếm A* trên trạng thái
+(x, y, hướng, đã có gold, số tên, bộ đếm wumpus, mốc wumpus, wumpus còn sống),
+chi phí là số điểm bị trừ theo đúng Environment.step. "Mốc wumpus" là vị trí các
+wumpus cùng trạng thái RNG sau mỗi lần chúng di chuyển, được đánh số và nhớ lại:
+mỗi (mốc, wumpus còn sống) chỉ chạy move_wumpus thật một lần.
+
+Điểm cuối = điểm hiện tại - chi phí + 1000 nếu grab được gold, kết thúc bằng
+climb ở (0,0); không lấy gold thì tốt nhất là về (0,0) climb luôn. Tìm kiếm dừng
+khi chi phí không còn có thể thắng phương án đó, nên luôn hữu hạn; max_states
+giới hạn bộ nhớ (vượt quá thì trả về phương án tốt nhất đã biết, exact=False).
+
+    python -m runner.oracle --seeds 0:100 --N 8 --K 2
+    python -m runner.headless --seeds 0:100 --N 8 --oracle
+"""
+import argparse
+import glob
+import heapq
+import json
+import os
+import time
+from functools import lru_cache
+
+from env.environment import Environment
+from env.grid import iter_bits
+from runner.headless import default_max_steps, parse_seed_range
+
+DIR_DELTA = ((0, 1), (1, 0), (0, -1), (-1, 0))
+DEFAULT_MAX_STATES = 1000000
+
+
+class WumpusTimeline:
+    """Các mốc wumpus đã gặp: id -> (vị trí, dict vị trí -> id wumpus), và chuyển mốc"""
+
+    def __init__(self, env):
+        self.env = env
+        self.ids = {}
+        self.nodes = []
+        self.moves = {}
+
+    def intern(self, positions, rng_state):
+        key = (positions, rng_state)
+        node = self.ids.get(key)
+        if node is None:
+            node = self.ids[key] = len(self.nodes)
+            self.nodes.append((positions, rng_state, {p: i for i, p in enumerate(positions)}))
+        return node
+
+    def occupant(self, node, pos):
+        return self.nodes[node][2].get(pos)
+
+    def move(self, node, alive):
+        """Mốc sau một lần wumpus di chuyển, chạy bằng chính Environment.move_wumpus"""
+        key = (node, alive)
+        nxt = self.moves.get(key)
+        if nxt is None:
+            env = self.env
+            positions, rng_state, _ = self.nodes[node]
+            snap = list(env.snapshot())
+            snap[7] = env.wumpus_move_interval - 1
+            snap[13] = positions
+            snap[14] = tuple(bool(alive >> i & 1) for i in range(len(positions)))
+            snap[15] = rng_state
+            env.restore(tuple(snap))
+            env.move_wumpus()
+            nxt = self.moves[key] = self.intern(tuple(env.wumpus_pos), env.wumpus_rng.getstate())
+        return nxt
+
+
+def pit_distances(env, source):
+    """Số bước ít nhất từ source tới từng ô, chỉ đi qua ô không có pit (bỏ qua wumpus)"""
+    N = env.N
+    dist = {source: 0}
+    frontier = [source]
+    while frontier:
+        nxt = []
+        for x, y in frontier:
+            d = dist[(x, y)] + 1
+            for dx, dy in DIR_DELTA:
+                c = (x + dx, y + dy)
+                if 0 <= c[0] < N and 0 <= c[1] < N and c not in dist and not env.has_pit(*c):
+                    dist[c] = d
+                    nxt.append(c)
+        frontier = nxt
+    return dist
+
+
+def wait_action(env, x, y, gold):
+    """Hành động chỉ tốn một lượt, không đổi gì (để chờ wumpus đi qua); None nếu
+    không có: ở (0,0) khi gold nằm ngay đó mà chưa lấy, climb thì thoát còn grab
+    thì lấy gold. Khi đó left/right vẫn chờ được, có tính cả hướng mới"""
+    if (x, y) != (0, 0):
+        return 'climb'
+    if gold or not env.has_gold(x, y):
+        return 'grab'
+    return None
+
+
+def search(env, timeline, start, want_gold, remaining, bound, max_states):
+    """A* tới (0,0) (có gold nếu want_gold); chi phí = số điểm bị trừ.
+
+    remaining(x, y, gold): cận dưới số lượt còn lại (None nếu không thể tới đích).
+
+    Trả về (chi phí, trạng thái đích, parent, exact) hoặc chi phí None nếu không
+    có đường với chi phí < bound.
+    """
+    N = env.N
+    interval = env.wumpus_move_interval
+
+    h0 = remaining(start[0], start[1], start[3])
+    parent = {start: None}
+    cost = {start: 0}
+    heap = [(h0, 0, start)] if h0 is not None else []
+    while heap:
+        f, g, state = heapq.heappop(heap)
+        if f >= bound:
+            break
+        if g > cost[state]:
+            continue
+        x, y, d, gold, arrows, counter, node, alive = state
+        if (x, y) == (0, 0) and (gold or not want_gold):
+            return g, state, parent, True
+        if len(parent) > max_states:
+            return None, None, parent, False
+        for action in ('forward', 'left', 'right', 'grab', 'shoot', 'wait'):
+            nx, ny, nd, ngold, narrows, nalive = x, y, d, gold, arrows, alive
+            step_cost = 1
+            target = None
+            if action == 'forward':
+                dx, dy = DIR_DELTA[d]
+                nx, ny = x + dx, y + dy
+                # Đụng tường cũng chỉ là chờ; đi vào pit/wumpus thì chết, không xét
+                if not (0 <= nx < N and 0 <= ny < N) or env.has_pit(nx, ny):
+                    continue
+                w = timeline.occupant(node, (nx, ny))
+                if w is not None and alive >> w & 1:
+                    continue
+            elif action == 'left':
+                nd = (d - 1) % 4
+            elif action == 'right':
+                nd = (d + 1) % 4
+            elif action == 'grab':
+                if not want_gold or gold or not env.has_gold(x, y):
+                    continue
+                ngold = True
+            elif action == 'shoot':
+                dx, dy = DIR_DELTA[d]
+                target = (x + dx, y + dy)
+                if not arrows or not (0 <= target[0] < N and 0 <= target[1] < N):
+                    continue
+                narrows -= 1
+                step_cost = 10
+            else:
+                action = wait_action(env, x, y, gold)
+                if action is None:
+                    continue
+            ncounter = counter + 1
+            nnode = node
+            if ncounter >= interval:
+                ncounter = 0
+                nnode = timeline.move(node, alive)
+            if target is not None:
+                # Tên trúng ở lượt sau, tức là sau khi wumpus đã di chuyển.
+                # Bắn trượt luôn kém hơn chờ một lượt nên bỏ qua
+                w = timeline.occupant(nnode, target)
+                if w is None or not alive >> w & 1:
+                    continue
+                nalive = alive & ~(1 << w)
+                step_cost += 10
+            nstate = (nx, ny, nd, ngold, narrows, ncounter, nnode, nalive)
+            ng = g + step_cost
+            if ng < cost.get(nstate, ng + 1):
+                hn = remaining(nx, ny, ngold)
+                if hn is None:
+                    continue
+                cost[nstate] = ng
+                parent[nstate] = (state, action)
+                heapq.heappush(heap, (ng + hn, ng, nstate))
+    return None, None, parent, True
+
+
+def solve(env, max_states=DEFAULT_MAX_STATES, max_cost=None):
+    """Điểm tốt nhất và chuỗi hành động từ trạng thái hiện tại của env (env không bị đổi).
+
+    Trả về dict score, actions, exact (False nếu dừng vì max_states), states.
+    max_cost: chỉ xét đường về (0,0) tốn ít hơn mức này (mặc định theo số bước
+    tối đa của một episode); không có đường nào thì score là None.
+    """
+    env = env.clone()
+    env.get_percepts()  # Xử lý tên đang bay (nếu có) như vòng lặp của runner
+    if not env.agent_alive or env.agent_escaped:
+        return {'score': env.score, 'actions': [], 'exact': True, 'states': 0}
+
+    golds = [divmod(i, env.N) for i in iter_bits(env.gold_bits)]
+    # Heuristic: khoảng cách đi vòng pit (bỏ qua lượt quay và wumpus) nên không ước lượng quá
+    home = pit_distances(env, (0, 0))
+    via_gold = {}
+    for gpos in golds:
+        if gpos in home:
+            for c, d in pit_distances(env, gpos).items():
+                via_gold[c] = min(via_gold.get(c, d + home[gpos]), d + home[gpos])
+
+    def to_home(x, y, gold):
+        return home.get((x, y))
+
+    def to_gold(x, y, gold):
+        if gold:
+            return home.get((x, y))
+        d = via_gold.get((x, y))
+        return d + 1 if d is not None else None
+
+    timeline = WumpusTimeline(env.clone())
+    node = timeline.intern(tuple(env.wumpus_pos), env.wumpus_rng.getstate())
+    alive = sum(1 << i for i, a in enumerate(env.wumpus_alive) if a)
+    start = (env.agent_pos[0], env.agent_pos[1], env.agent_dir, env.gold_grabbed,
+             env.agent_arrows, env.wumpus_move_counter, node, alive)
+
+    if max_cost is None:
+        max_cost = default_max_steps(env.N) + 20 * env.agent_arrows
+    # Về (0,0) climb luôn, không lấy gold; rồi xem lấy gold có lợi hơn không
+    g, goal, parent, exact = search(env, timeline, start, False, to_home, max_cost, max_states)
+    states = len(parent)
+    best = (env.score - g - 1, goal, parent) if g is not None else None
+    if via_gold and not env.gold_grabbed and exact:
+        bound = 1000 + g if g is not None else max_cost
+        g, goal, parent, exact = search(env, timeline, start, True, to_gold, bound, max_states)
+        states += len(parent)
+        if g is not None:
+            best = (env.score + 1000 - g - 1, goal, parent)
+    if best is None:
+        # Không về được (0,0) trong max_cost
+        return {'score': None, 'actions': [], 'exact': exact, 'states': states}
+
+    score, state, parent = best
+    actions = ['climb']
+    while parent[state] is not None:
+        state, action = parent[state]
+        actions.append(action)
+    actions.reverse()
+    return {'score': score, 'actions': actions, 'exact': exact, 'states': states}
+
+
+@lru_cache(maxsize=4096)
+def solve_map(seed=42, mapfile=None, N=4, K=1, p=0.2, max_states=DEFAULT_MAX_STATES):
+    """solve() cho map mới tạo như run_episode; nhớ kết quả trong process"""
+    start = time.perf_counter()
+    env = Environment(N=N, K=K, p=p, seed=seed, mapfile=mapfile)
+    result = solve(env, max_states)
+    result.update(seed=None if mapfile else seed, mapfile=mapfile, N=env.N,
+                  wall_time=time.perf_counter() - start)
+    return result
+
+
+def _solve_spec(spec):
+    return solve_map(**spec)
+
+
+def solve_specs(specs, workers=None, chunksize=None):
+    """solve_map cho nhiều map song song, kết quả đúng thứ tự specs.
+
+    spec là dict tham số của solve_map; các spec của runner.headless (seed_specs,
+    map_specs) dùng được luôn, các khoá chỉ dành cho episode bị bỏ qua.
+    """
+    keys = ('seed', 'mapfile', 'N', 'K', 'p', 'max_states')
+    specs = [{k: s[k] for k in keys if k in s} for s in specs]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(specs) <= 1:
+        return [dict(_solve_spec(s)) for s in specs]
+    if chunksize is None:
+        chunksize = max(1, len(specs) // (workers * 8))
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_solve_spec, specs, chunksize=chunksize))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Best achievable score per map with full information")
+    parser.add_argument('--seeds', default='0:100', help="seed hoặc khoảng seed 'a:b'")
+    parser.add_argument('--maps', nargs='*', help="file map (bỏ qua --seeds)")
+    parser.add_argument('--N', type=int, default=4)
+    parser.add_argument('--K', type=int, default=1)
+    parser.add_argument('--p', type=float, default=0.2)
+    parser.add_argument('--max-states', type=int, default=DEFAULT_MAX_STATES)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', help="ghi kết quả từng map (kèm chuỗi hành động) ra file JSON")
+    args = parser.parse_args(argv)
+
+    if args.maps:
+        files = sorted(f for pattern in args.maps for f in glob.glob(pattern))
+        specs = [dict(mapfile=f, max_states=args.max_states) for f in files]
+    else:
+        specs = [dict(seed=s, N=args.N, K=args.K, p=args.p, max_states=args.max_states)
+                 for s in parse_seed_range(args.seeds)]
+    start = time.perf_counter()
+    results = solve_specs(specs, workers=args.workers)
+    scores = [r['score'] for r in results if r['score'] is not None]
+    print(json.dumps({
+        'maps': len(results),
+        'mean_score': sum(scores) / len(scores) if scores else None,
+        'no_escape': len(results) - len(scores),
+        'inexact': sum(not r['exact'] for r in results),
+        'mean_states': sum(r['states'] for r in results) / max(1, len(results)),
+        'elapsed': time.perf_counter() - start,
+    }, indent=2))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Đo thời gian và đếm số lần gọi theo từng phase của Environment/Agent.
+
+Environment và Agent có thuộc tính profiler (mặc định None). Khi gắn một
+Profiler vào, mỗi phase ghi lại thời gian và số lần gọi, các bộ đếm (số node
+A* mở rộng, ...) cộng dồn. Khi profiler là None, mỗi phase chỉ tốn một phép
+kiểm tra thuộc tính.
+
+    prof = Profiler()
+    env.profiler = agent.profiler = prof
+    ...
+    prof.as_dict()  # {phase: {'calls', 'time', 'count'}}
+"""
+import csv
+import io
+from time import perf_counter
+
+FIELDS = ('phase', 'calls', 'time', 'count')
+
+
+class Profiler:
+    def __init__(self):
+        self.calls = {}
+        self.time = {}
+        self.counts = {}
+
+    @staticmethod
+    def start():
+        return perf_counter()
+
+    def stop(self, phase, t0):
+        """Kết thúc phase bắt đầu lúc t0 (lấy từ start())"""
+        self.time[phase] = self.time.get(phase, 0.0) + perf_counter() - t0
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def reset(self):
+        self.calls.clear()
+        self.time.clear()
+        self.counts.clear()
+
+    def as_dict(self):
+        result = {}
+        for phase in sorted(self.calls.keys() | self.counts.keys()):
+            result[phase] = {
+                'calls': self.calls.get(phase, 0),
+                'time': self.time.get(phase, 0.0),
+                'count': self.counts.get(phase, 0),
+            }
+        return result
+
+
+def to_csv(profiles, extra=()):
+    """CSV từ list (thông tin episode, profile dict), mỗi phase một dòng.
+
+    extra: các khóa thông tin episode cần đưa thành cột (seed, mapfile, ...).
+    """
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(list(extra) + list(FIELDS))
+    for info, profile in profiles:
+        for phase, row in profile.items():
+            writer.writerow([info.get(k) for k in extra] + [phase] + [row[f] for f in FIELDS[1:]])
+    return out.getvalue()
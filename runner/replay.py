@@ -0,0 +1,255 @@
+"""Ghi lại episode và phát lại, tua được tới bước bất kỳ.
+
+File .wrec = b'WREC' + zlib(json) gồm:
+    header     thông tin episode (agent, seed/mapfile, N, K, p, kết quả, ...)
+    map        phần tĩnh của env (Environment.STATIC_FIELDS)
+    actions    mỗi hành động 1 byte (chỉ số trong ACTIONS)
+    snapshots  Environment.snapshot() và trạng thái agent sau các bước 0,
+               interval, 2*interval, ...
+Các trường bytes (bit plane, actions, hàng KB, percept) ghi dạng base64. Chỉ
+có dữ liệu thuần, không pickle: mở bản ghi của người khác không chạy được code
+lạ, và đổi tên thuộc tính trong Agent không làm hỏng bản ghi cũ. Trạng thái
+agent (xem agent_state) là các hàng bitboard KB, percept từng ô, vị trí, hướng,
+has_gold và RNG của RandomAgent; action_log dựng lại từ actions, kế hoạch đường
+đi và cache xác suất thì tính lại khi cần.
+
+Tua tới bước k: khôi phục snapshot gần nhất trước k rồi chạy tiếp tối đa
+interval bước, nên chi phí theo interval chứ không theo k. Khi chạy lại,
+agent vẫn gọi next_action (để kb và RNG của nó đi đúng như lúc ghi) nhưng
+env luôn nhận hành động đã ghi. RNG wumpus của env và RNG của agent nằm trong
+snapshot, nên không phụ thuộc random toàn cục.
+
+    python -m runner.headless --seeds 0:10 --N 8 --record-dir recs
+    python -m runner.replay recs/seed_3.wrec --step 120
+"""
+import argparse
+import base64
+import json
+import random
+import zlib
+
+from agent.bitboard import iter_row
+from env.environment import Environment
+
+MAGIC = b'WREC'
+VERSION = 5
+ACTIONS = ('forward', 'left', 'right', 'grab', 'climb', 'shoot')
+ACTION_CODE = {a: i for i, a in enumerate(ACTIONS)}
+DEFAULT_INTERVAL = 1000
+KB_PLANES = ('visited', 'safe', 'warn', 'danger', 'breeze', 'stench')
+
+
+def to_text(data):
+    return base64.b64encode(bytes(data)).decode('ascii')
+
+
+def from_text(text):
+    return base64.b64decode(text)
+
+
+def map_state(env):
+    """Phần tĩnh của env, bit plane đổi thành base64"""
+    return {name: to_text(value) if isinstance(value, (bytes, bytearray, memoryview)) else value
+            for name, value in ((n, getattr(env, n)) for n in Environment.STATIC_FIELDS)}
+
+
+def env_from_state(static, snap):
+    env = Environment.__new__(Environment)
+    for name, value in static.items():
+        if name not in Environment.STATIC_FIELDS:
+            raise ValueError(f"Unknown map field {name!r}")
+        setattr(env, name, from_text(value) if name.endswith('_bits') else value)
+    env.profiler = None
+    env.wumpus_rng = random.Random()
+    env.restore(snap)
+    return env
+
+
+def env_snapshot(data):
+    """Environment.snapshot() từ list đã qua json (list -> tuple như bản gốc)"""
+    snap = list(data)
+    snap[0] = tuple(snap[0])
+    snap[9] = tuple(snap[9]) if snap[9] is not None else None
+    snap[13] = tuple(tuple(pos) for pos in snap[13])
+    snap[14] = tuple(snap[14])
+    snap[15] = rng_state(snap[15])
+    return tuple(snap)
+
+
+def rng_state(data):
+    version, internal, gauss = data
+    return version, tuple(internal), gauss
+
+
+def pack_rows(rows, N):
+    """Hàng bitboard (int N bit) -> base64 của N * ceil(N/8) byte"""
+    width = (N + 7) // 8
+    return to_text(b''.join(row.to_bytes(width, 'little') for row in rows))
+
+
+def unpack_rows(text, N):
+    raw = from_text(text)
+    width = (N + 7) // 8
+    if len(raw) != N * width:
+        raise ValueError(f"KB plane has {len(raw)} bytes, expected {N * width}")
+    return [int.from_bytes(raw[i:i + width], 'little') for i in range(0, len(raw), width)]
+
+
+def agent_state(agent):
+    """Trạng thái agent dạng dữ liệu thuần (Agent hoặc RandomAgent)"""
+    state = {'N': agent.N, 'x': agent.x, 'y': agent.y, 'dir': agent.dir,
+             'has_gold': agent.has_gold}
+    bits = getattr(agent, 'bits', None)
+    if bits is not None:
+        risk = agent.risk_model
+        state.update(kind='agent', incremental=agent.incremental,
+                     p=risk.pits.prior, p_wumpus=risk.wumpus.prior,
+                     kb={name: pack_rows(getattr(bits, name), agent.N) for name in KB_PLANES},
+                     percepts=to_text(agent.percept_history))
+    else:
+        state.update(kind='random', rng=agent.rng.getstate(),
+                     visited=sorted(agent.visited))
+    return state
+
+
+def agent_from_state(state, action_log):
+    """Dựng lại agent từ agent_state(); action_log là các hành động đã chạy"""
+    N = state['N']
+    if state['kind'] == 'agent':
+        from agent.agent import Agent
+        agent = Agent(N, p=state['p'], incremental=state['incremental'])
+        agent.risk_model.wumpus.prior = state['p_wumpus']
+        for name in KB_PLANES:
+            setattr(agent.bits, name, unpack_rows(state['kb'][name], N))
+        agent.visited = {(x, y) for y, row in enumerate(agent.bits.visited) for x in iter_row(row)}
+        percepts = from_text(state['percepts'])
+        if len(percepts) != N * N:
+            raise ValueError(f"Percept history has {len(percepts)} bytes, expected {N * N}")
+        agent.percept_history = bytearray(percepts)
+    elif state['kind'] == 'random':
+        from agent.random_agent import RandomAgent
+        agent = RandomAgent(N)
+        agent.rng.setstate(rng_state(state['rng']))
+        agent.visited = {tuple(c) for c in state['visited']}
+    else:
+        raise ValueError(f"Unknown agent kind {state['kind']!r}")
+    agent.x, agent.y, agent.dir = state['x'], state['y'], state['dir']
+    agent.has_gold = state['has_gold']
+    agent.action_log = list(action_log)
+    return agent
+
+
+def take_snapshot(step, env, agent):
+    return {
+        'step': step,
+        'env': env.snapshot(),
+        'agent': agent_state(agent),
+    }
+
+
+class Recorder:
+    """Ghi một episode: gọi record(action) sau mỗi env.step + update_agent_state"""
+
+    def __init__(self, env, agent, interval=DEFAULT_INTERVAL, header=None):
+        self.interval = interval
+        self.header = dict(header or {}, N=env.N, interval=interval)
+        self.actions = bytearray()
+        self.map = map_state(env)
+        self.snapshots = [take_snapshot(0, env, agent)]
+        self.env = env
+        self.agent = agent
+
+    def record(self, action):
+        self.actions.append(ACTION_CODE[action])
+        if len(self.actions) % self.interval == 0:
+            self.snapshots.append(take_snapshot(len(self.actions), self.env, self.agent))
+
+    def save(self, path, **result):
+        data = {
+            'version': VERSION,
+            'header': dict(self.header, steps=len(self.actions), **result),
+            'map': self.map,
+            'actions': to_text(self.actions),
+            'snapshots': self.snapshots,
+        }
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(zlib.compress(json.dumps(data, separators=(',', ':')).encode()))
+
+
+class Replay:
+    """Phát lại file .wrec: seek(k) đưa env/agent về trạng thái sau k bước"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        if raw[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an episode recording")
+        try:
+            data = json.loads(zlib.decompress(raw[len(MAGIC):]))
+        except (zlib.error, ValueError):
+            raise ValueError(f"{path} is not a readable recording (older versions were pickled)")
+        if data.get('version') != VERSION:
+            raise ValueError(f"Unsupported recording version {data.get('version')}")
+        self.header = data['header']
+        self.map = data['map']
+        self.actions = from_text(data['actions'])
+        if self.actions and max(self.actions) >= len(ACTIONS):
+            raise ValueError(f"{path} has an unknown action code")
+        self.snapshots = data['snapshots']
+        self.step = None
+        self.env = None
+        self.agent = None
+        self.percepts = 0
+        self.seek(0)
+
+    def __len__(self):
+        return len(self.actions)
+
+    def action(self, k):
+        """Hành động ở bước k (0-based)"""
+        return ACTIONS[self.actions[k]]
+
+    def seek(self, k):
+        k = max(0, min(k, len(self.actions)))
+        # Đang ở trước k và cùng đoạn snapshot thì chạy tiếp, khỏi khôi phục
+        base = max((s for s in self.snapshots if s['step'] <= k), key=lambda s: s['step'])
+        if self.step is None or not base['step'] <= self.step <= k:
+            self.env = env_from_state(self.map, env_snapshot(base['env']))
+            self.agent = agent_from_state(base['agent'], map(self.action, range(base['step'])))
+            self.step = base['step']
+            self.percepts = 0
+        while self.step < k:
+            self.advance()
+        return self.env, self.agent
+
+    def advance(self):
+        """Chạy bước tiếp theo theo hành động đã ghi"""
+        action = self.action(self.step)
+        percepts = self.env.get_percepts()
+        self.agent.next_action(percepts)
+        self.env.step(action)
+        self.agent.update_agent_state(action, percepts)
+        self.percepts = percepts
+        self.step += 1
+        return action
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect an episode recording")
+    parser.add_argument('recording')
+    parser.add_argument('--step', type=int, default=None, help="tua tới bước này (mặc định: cuối)")
+    args = parser.parse_args(argv)
+
+    replay = Replay(args.recording)
+    step = len(replay) if args.step is None else args.step
+    env, agent = replay.seek(step)
+    print(replay.header)
+    print(f"step {replay.step}/{len(replay)}: pos={env.agent_pos} dir={env.agent_dir} "
+          f"score={env.score} alive={env.agent_alive} escaped={env.agent_escaped}")
+    if replay.step < len(replay):
+        print(f"next action: {replay.action(replay.step)}")
+
+
+if __name__ == '__main__':
+    main()
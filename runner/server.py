@@ -0,0 +1,365 @@
+"""Server asyncio giữ nhiều Environment cho agent chạy ở process khác.
+
+Agent không import được vào process này nói chuyện với server qua Unix socket
+hoặc TCP localhost. Mỗi kết nối mở bao nhiêu session cũng được, mỗi session là
+một Environment riêng (RNG riêng nên chạy xen kẽ vẫn tái lập đúng theo seed).
+Session thuộc về kết nối đã mở nó và bị xoá khi kết nối đóng.
+
+Giao thức: mỗi frame = độ dài payload '<I' + payload, byte đầu payload là op.
+    RESET  gửi  '<BBIIdqI' op, cờ (bit 0: có seed), N, K, p, seed, max_steps
+                + đường dẫn map utf-8 (rỗng: sinh map theo seed)
+           nhận '<BBIII' op, status, session, N, số wumpus + STATE + percept
+    STEP   gửi  '<BH' op, số mục + mỗi mục '<IH' session, n + n byte hành động
+           nhận '<BBH' op, status, số mục + mỗi mục '<IBH' session, status,
+                số bước đã chạy + STATE + 1 byte percept sau mỗi bước đã chạy
+    CLOSE  gửi  '<BI' op, session; nhận '<BB' op, status
+STATE = '<iIBBIIB' score, số bước, cờ (alive, escaped, gold), hướng, x, y, số tên.
+Hành động mã hoá như runner.replay.ACTIONS, percept là 1 byte như env/percept.py.
+Mỗi mục STEP dừng sớm khi episode kết thúc (chết, thoát hoặc đủ max_steps, 0
+là không giới hạn); gộp nhiều bước và nhiều session vào một frame để đỡ tốn
+round trip. Frame sai hoặc tham số map không hợp lệ (N ngoài 1..MAX_N, p ngoài
+[0, 1), K + 1 nhiều hơn số ô trừ (0,0), pit chiếm hết chỗ, file map lớn hơn
+MAX_N hoặc MAX_MAP_BYTES, file map hỏng): status ERROR + thông báo utf-8.
+
+    python -m runner.server --unix /tmp/wumpus.sock
+    python -m runner.headless --remote /tmp/wumpus.sock --seeds 0:100
+"""
+import argparse
+import asyncio
+import os
+import socket
+import struct
+
+from env import binmap
+from env.environment import Environment
+from runner.replay import ACTIONS, ACTION_CODE
+
+OP_RESET, OP_STEP, OP_CLOSE = 1, 2, 3
+OK, ERROR, UNKNOWN_SESSION = 0, 1, 2
+
+FRAME = struct.Struct('<I')
+MAX_FRAME = 1 << 24
+MAX_N = 256  # Giới hạn kích thước map một RESET được yêu cầu (cả map nạp từ file)
+MAX_MAP_BYTES = 1 << 22  # File map JSON lớn hơn thì không nạp
+RESET = struct.Struct('<BBIIdqI')
+RESET_REPLY = struct.Struct('<BBIII')
+STEP = struct.Struct('<BH')
+STEP_ENTRY = struct.Struct('<IH')
+STEP_REPLY = struct.Struct('<BBH')
+STEP_REPLY_ENTRY = struct.Struct('<IBH')
+CLOSE = struct.Struct('<BI')
+STATUS = struct.Struct('<BB')
+STATE = struct.Struct('<iIBBIIB')
+
+ALIVE, ESCAPED, GOLD = 1, 2, 4
+
+
+def check_params(N, K, p):
+    """Từ chối tham số map không hợp lệ trước khi dựng env (chạy ngay trên event loop)"""
+    if not 1 <= N <= MAX_N:
+        raise ValueError(f"N must be in 1..{MAX_N}, got {N}")
+    if not 0 <= p < 1:
+        raise ValueError(f"p must be in [0, 1), got {p}")
+    if K + 1 > N * N - 1:
+        raise ValueError(f"K + 1 = {K + 1} does not fit in {N * N - 1} free cells")
+
+
+def check_mapfile(path):
+    """Từ chối file map quá lớn trước khi nạp: .wmap theo N trong header, JSON theo kích thước file"""
+    if binmap.is_binary(path):
+        with open(path, 'rb') as f:
+            header = f.read(binmap.HEADER.size)
+        if len(header) < binmap.HEADER.size:
+            raise ValueError(f"{path} is truncated")
+        N = binmap.HEADER.unpack(header)[4]
+        if not 1 <= N <= MAX_N:
+            raise ValueError(f"N must be in 1..{MAX_N}, got {N}")
+    elif os.path.getsize(path) > MAX_MAP_BYTES:
+        raise ValueError(f"Map file larger than {MAX_MAP_BYTES} bytes")
+
+
+class Session:
+    """Một Environment trên server cùng percept của lượt hiện tại"""
+    __slots__ = ('env', 'max_steps', 'steps', 'percepts')
+
+    def __init__(self, env, max_steps=0):
+        self.env = env
+        self.max_steps = max_steps
+        self.steps = 0
+        self.percepts = env.get_percepts()
+
+    def over(self):
+        env = self.env
+        return (not env.agent_alive or env.agent_escaped
+                or (self.max_steps and self.steps >= self.max_steps))
+
+    def run(self, actions):
+        """Chạy lần lượt các hành động (đã mã hoá) tới khi episode kết thúc"""
+        env = self.env
+        out = bytearray()
+        for code in actions:
+            if self.over():
+                break
+            env.step(ACTIONS[code])
+            self.steps += 1
+            # Lấy percept ngay (như vòng lặp của runner) vì get_percepts còn xử lý tên đang bay
+            self.percepts = env.get_percepts()
+            out.append(self.percepts)
+        return out
+
+    def state(self):
+        env = self.env
+        flags = (ALIVE * env.agent_alive) | (ESCAPED * env.agent_escaped) | (GOLD * env.gold_grabbed)
+        x, y = env.agent_pos
+        return STATE.pack(env.score, self.steps, flags, env.agent_dir, x, y, env.agent_arrows)
+
+
+class EnvServer:
+    """Xử lý các kết nối; sessions của mỗi kết nối nằm trong handle()"""
+
+    def __init__(self, max_sessions=100000):
+        self.max_sessions = max_sessions
+        self.active = 0
+
+    async def handle(self, reader, writer):
+        sessions = {}
+        try:
+            while True:
+                try:
+                    (size,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+                    if size > MAX_FRAME:
+                        break
+                    payload = await reader.readexactly(size)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                try:
+                    reply = self.dispatch(payload, sessions)
+                except Exception as e:
+                    # Mọi lỗi của một frame (kể cả map hỏng) chỉ thành ERROR, không cắt kết nối
+                    message = str(e) or type(e).__name__
+                    reply = STATUS.pack(payload[0] if payload else 0, ERROR) + message.encode()
+                writer.write(FRAME.pack(len(reply)) + reply)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.active -= len(sessions)
+            writer.close()
+
+    def dispatch(self, payload, sessions):
+        op = payload[0]
+        if op == OP_STEP:
+            return self.step(payload, sessions)
+        if op == OP_RESET:
+            return self.reset(payload, sessions)
+        if op == OP_CLOSE:
+            _, sid = CLOSE.unpack(payload)
+            if sessions.pop(sid, None) is None:
+                return STATUS.pack(op, UNKNOWN_SESSION)
+            self.active -= 1
+            return STATUS.pack(op, OK)
+        raise ValueError(f"Unknown op {op}")
+
+    def reset(self, payload, sessions):
+        _, flags, N, K, p, seed, max_steps = RESET.unpack_from(payload)
+        mapfile = payload[RESET.size:].decode() or None
+        if self.active >= self.max_sessions:
+            raise ValueError(f"Too many sessions ({self.max_sessions})")
+        if mapfile:
+            check_mapfile(mapfile)
+        else:
+            check_params(N, K, p)
+        env = Environment(N=N, K=K, p=p, seed=seed if flags & 1 else None, mapfile=mapfile)
+        if env.N > MAX_N:
+            raise ValueError(f"Map size {env.N} exceeds {MAX_N}")
+        sid = len(sessions) + 1
+        while sid in sessions:
+            sid += 1
+        session = sessions[sid] = Session(env, max_steps)
+        self.active += 1
+        return (RESET_REPLY.pack(OP_RESET, OK, sid, env.N, len(env.wumpus_pos))
+                + session.state() + bytes((session.percepts,)))
+
+    def step(self, payload, sessions):
+        _, count = STEP.unpack_from(payload)
+        # Kiểm tra cả frame trước, frame sai thì không session nào bị chạy dở
+        entries = []
+        offset = STEP.size
+        for _ in range(count):
+            sid, n = STEP_ENTRY.unpack_from(payload, offset)
+            offset += STEP_ENTRY.size
+            actions = payload[offset:offset + n]
+            offset += n
+            if len(actions) != n or max(actions, default=0) >= len(ACTIONS):
+                raise ValueError(f"Bad actions for session {sid}")
+            entries.append((sid, actions))
+        parts = [STEP_REPLY.pack(OP_STEP, OK, count)]
+        for sid, actions in entries:
+            session = sessions.get(sid)
+            if session is None:
+                parts.append(STEP_REPLY_ENTRY.pack(sid, UNKNOWN_SESSION, 0))
+                continue
+            percepts = session.run(actions)
+            parts.append(STEP_REPLY_ENTRY.pack(sid, OK, len(percepts)))
+            parts.append(session.state())
+            parts.append(percepts)
+        return b''.join(parts)
+
+
+async def start(address, max_sessions=100000):
+    """Mở server trên loop hiện tại; address là đường dẫn Unix socket hoặc (host, port)"""
+    server = EnvServer(max_sessions)
+    if isinstance(address, str):
+        return await asyncio.start_unix_server(server.handle, path=address)
+    return await asyncio.start_server(server.handle, *address)
+
+
+def serve(address, max_sessions=100000):
+    """Chạy server tới khi Ctrl+C. Tự quản lý loop thay vì asyncio.run và
+    Server.serve_forever (cần Python 3.7+), để vẫn chạy được trên 3.6"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    srv = loop.run_until_complete(start(address, max_sessions))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.close()
+        loop.run_until_complete(srv.wait_closed())
+        loop.close()
+
+
+def parse_address(text):
+    """'/tmp/x.sock' hoặc 'unix:/tmp/x.sock' -> đường dẫn; 'host:port' hoặc 'port' -> (host, port)"""
+    if text.startswith('unix:'):
+        return text[len('unix:'):]
+    if '/' in text:
+        return text
+    host, _, port = text.rpartition(':')
+    return (host or '127.0.0.1', int(port))
+
+
+class Client:
+    """Client đồng bộ: một kết nối, nhiều RemoteEnvironment"""
+
+    def __init__(self, address):
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(address)
+        else:
+            self.sock = socket.create_connection(address)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.rfile = self.sock.makefile('rb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+    def request(self, payload):
+        self.sock.sendall(FRAME.pack(len(payload)) + payload)
+        header = self.rfile.read(FRAME.size)
+        if len(header) < FRAME.size:
+            raise ConnectionError("Server closed the connection")
+        (size,) = FRAME.unpack(header)
+        reply = self.rfile.read(size)
+        if reply[1] == ERROR:
+            raise RuntimeError(f"Server error: {reply[2:].decode()}")
+        return reply
+
+    def make_env(self, N=4, K=1, p=0.2, seed=42, mapfile=None, max_steps=0):
+        """Mở session mới trên server, giống Environment(N, K, p, seed, mapfile)"""
+        payload = RESET.pack(OP_RESET, seed is not None, N, K, p, seed or 0, max_steps)
+        reply = self.request(payload + (mapfile or '').encode())
+        _, _, sid, N, K = RESET_REPLY.unpack_from(reply)
+        env = RemoteEnvironment(self, sid, N, K, p)
+        env.set_state(reply, RESET_REPLY.size)
+        env.percepts = reply[-1]
+        return env
+
+    def step_many(self, batch):
+        """Một round trip cho nhiều session: batch là list (env, [hành động, ...]).
+
+        Trả về list số bước đã chạy của từng mục (ít hơn số hành động nếu episode
+        kết thúc giữa chừng); percept sau từng bước nằm trong env.history.
+        """
+        parts = [STEP.pack(OP_STEP, len(batch))]
+        for env, actions in batch:
+            codes = bytes(ACTION_CODE[a] for a in actions)
+            parts.append(STEP_ENTRY.pack(env.session, len(codes)))
+            parts.append(codes)
+        reply = self.request(b''.join(parts))
+        offset = STEP_REPLY.size
+        applied = []
+        for env, _ in batch:
+            sid, status, n = STEP_REPLY_ENTRY.unpack_from(reply, offset)
+            offset += STEP_REPLY_ENTRY.size
+            if status == UNKNOWN_SESSION:
+                raise RuntimeError(f"Unknown session {sid}")
+            env.set_state(reply, offset)
+            offset += STATE.size
+            env.history = reply[offset:offset + n]
+            offset += n
+            if n:
+                env.percepts = env.history[-1]
+            applied.append(n)
+        return applied
+
+
+class RemoteEnvironment:
+    """Session trên server, dùng được thay Environment trong vòng lặp của runner"""
+
+    def __init__(self, client, session, N, K, p):
+        self.client = client
+        self.session = session
+        self.N = N
+        self.K = K
+        self.p = p
+        self.wumpus_pos = [None] * K  # Chỉ để biết số wumpus, vị trí không gửi về client
+        self.percepts = 0
+        self.history = b''
+
+    def set_state(self, reply, offset):
+        (self.score, self.steps, flags, self.agent_dir, x, y,
+         self.agent_arrows) = STATE.unpack_from(reply, offset)
+        self.agent_pos = (x, y)
+        self.agent_alive = bool(flags & ALIVE)
+        self.agent_escaped = bool(flags & ESCAPED)
+        self.gold_grabbed = bool(flags & GOLD)
+
+    def get_percepts(self):
+        """Percept của lượt hiện tại (đã có sẵn, không tốn round trip)"""
+        return self.percepts
+
+    def step(self, action):
+        self.client.step_many([(self, (action,))])
+
+    def run(self, actions):
+        """Chạy nhiều hành động trong một round trip, trả về số bước đã chạy"""
+        return self.client.step_many([(self, actions)])[0]
+
+    def close(self):
+        self.client.request(CLOSE.pack(OP_CLOSE, self.session))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Wumpus World environments over a socket")
+    parser.add_argument('--unix', help="đường dẫn Unix socket")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7878)
+    parser.add_argument('--max-sessions', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    address = args.unix or (args.host, args.port)
+    print(f"Serving on {address}")
+    serve(address, args.max_sessions)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Quét lưới (N, K, p, seed), kết quả từng episode được cache trên đĩa.
+
+Cache là file sqlite, khoá (agent, mã băm code, N, K, p, seed, max_steps). Mã
+băm lấy từ nội dung các file .py của agent/, env/, config.py và vòng lặp
+episode (runner/headless.py cùng module nó import), nên sửa agent, luật chơi
+hay cách chạy episode thì các kết quả cũ tự nhiên không còn khớp; chạy lại
+cùng sweep chỉ tính những ô chưa có. Kết quả mới được ghi sau mỗi lô, dừng giữa chừng
+cũng không mất phần đã chạy.
+
+    python -m runner.sweep --agent agent --N 4 6 8 --K 1 2 --p 0.1 0.2 --seeds 0:500
+"""
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import time
+
+from runner.headless import AGENTS, default_max_steps, parse_seed_range, run_episodes, seed_specs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# runner/headless.py chứa make_agent (prior), vòng lặp episode và default_max_steps;
+# runner/profiler.py được vòng lặp đó import
+CODE_PATTERNS = ('agent/*.py', 'env/*.py', 'config.py', 'runner/headless.py', 'runner/profiler.py')
+DEFAULT_CACHE = 'sweep_cache.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    agent TEXT, code TEXT, N INTEGER, K INTEGER, p REAL, seed INTEGER, max_steps INTEGER,
+    score INTEGER, steps INTEGER, outcome TEXT, gold INTEGER,
+    PRIMARY KEY (agent, code, N, K, p, seed, max_steps)
+)
+"""
+
+
+def code_hash(root=ROOT):
+    """sha256 (16 ký tự đầu) của code quyết định kết quả episode"""
+    h = hashlib.sha256()
+    files = sorted(f for pattern in CODE_PATTERNS for f in glob.glob(os.path.join(root, pattern)))
+    for path in files:
+        h.update(os.path.relpath(path, root).encode())
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+class ResultCache:
+    """Kết quả episode trong sqlite, tra theo (agent, code, N, K, p, seed, max_steps)"""
+
+    def __init__(self, path=DEFAULT_CACHE):
+        self.db = sqlite3.connect(path)
+        self.db.execute(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def lookup(self, agent, code, N, K, p, max_steps, seeds):
+        """{seed: kết quả} của các seed đã có"""
+        rows = self.db.execute(
+            "SELECT seed, score, steps, outcome, gold FROM results "
+            "WHERE agent=? AND code=? AND N=? AND K=? AND p=? AND max_steps=?",
+            (agent, code, N, K, p, max_steps))
+        wanted = set(seeds)
+        return {seed: {'seed': seed, 'score': score, 'steps': steps, 'outcome': outcome,
+                       'gold': bool(gold)}
+                for seed, score, steps, outcome, gold in rows if seed in wanted}
+
+    def store(self, agent, code, max_steps, results):
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(agent, code, r['N'], r['K'], r['p'], r['seed'], max_steps, r['score'],
+                  r['steps'], r['outcome'], int(r['gold'])) for r in results])
+
+
+def summarize_cell(results):
+    n = len(results)
+    return {
+        'episodes': n,
+        'mean_score': sum(r['score'] for r in results) / n,
+        'win_rate': sum(r['outcome'] == 'escaped' and r['gold'] for r in results) / n,
+        'death_rate': sum(r['outcome'] == 'dead' for r in results) / n,
+        'mean_steps': sum(r['steps'] for r in results) / n,
+    }
+
+
+def sweep(agent, Ns, Ks, ps, seeds, cache_path=DEFAULT_CACHE, max_steps=None, workers=None,
+          chunk=2000):
+    """Chạy (hoặc lấy từ cache) mọi (N, K, p, seed); trả về list tổng kết từng ô (N, K, p)"""
+    seeds = list(seeds)
+    code = code_hash()
+    cache = ResultCache(cache_path)
+    cells = []
+    try:
+        for N, K, p in itertools.product(Ns, Ks, ps):
+            steps = max_steps if max_steps is not None else default_max_steps(N)
+            found = cache.lookup(agent, code, N, K, p, steps, seeds)
+            missing = [s for s in seeds if s not in found]
+            for i in range(0, len(missing), chunk):
+                results = run_episodes(seed_specs(agent, missing[i:i + chunk], N, K, p, steps),
+                                       workers=workers)
+                for r in results:
+                    r.update(K=K, p=p)
+                cache.store(agent, code, steps, results)
+                found.update((r['seed'], r) for r in results)
+            cell = {'agent': agent, 'N': N, 'K': K, 'p': p,
+                    'cached': len(seeds) - len(missing)}
+            cell.update(summarize_cell([found[s] for s in seeds]))
+            cells.append(cell)
+    finally:
+        cache.close()
+    return cells
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep agents over a grid of N, K, p and seeds")
+    parser.add_argument('--agent', choices=AGENTS, nargs='+', default=['agent'])
+    parser.add_argument('--N', type=int, nargs='+', default=[4])
+    parser.add_argument('--K', type=int, nargs='+', default=[1])
+    parser.add_argument('--p', type=float, nargs='+', default=[0.2])
+    parser.add_argument('--seeds', default='0:100', help="seed hoặc khoảng seed 'a:b'")
+    parser.add_argument('--max-steps', type=int, default=None)
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help="file sqlite lưu kết quả")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', help="ghi tổng kết từng ô ra file JSON")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    cells = []
+    for agent in args.agent:
+        cells += sweep(agent, args.N, args.K, args.p, parse_seed_range(args.seeds),
+                       args.cache, args.max_steps, args.workers)
+    for c in cells:
+        print(f"{c['agent']:6} N={c['N']:<4} K={c['K']:<3} p={c['p']:<5} "
+              f"episodes={c['episodes']:<6} cached={c['cached']:<6} "
+              f"score={c['mean_score']:9.2f} win={c['win_rate']:.3f} dead={c['death_rate']:.3f}")
+    print(f"elapsed {time.perf_counter() - start:.2f}s")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(cells, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
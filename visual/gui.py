@@ -1,10 +1,15 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog
 import threading
 import time
 import os
+import math
 from env.environment import Environment
 from agent.agent import Agent
+from agent.bitboard import iter_row
+from env.grid import iter_bits
+from env.percept import SCREAM, describe
+from runner.replay import Recorder, Replay
 
 class WumpusGUI(tk.Tk):
     CELL_SIZE = 60
@@ -21,19 +26,50 @@ class WumpusGUI(tk.Tk):
         'border': '#AAAAAA'
     }
     DIR_ARROW = ['↑', '→', '↓', '←']
+    # Ký hiệu cho từng nhãn kb: (chữ, font, màu)
+    SYMBOLS = {
+        'warn': ("!", ('Arial', 16, 'bold'), 'orange'),
+        'danger': ("X", ('Arial', 16, 'bold'), 'red'),
+        'safe': ("S", ('Arial', 14), 'green'),
+        'visited': ("•", ('Arial', 10), 'gray'),
+        'unknown': ("", ('Arial', 10), 'gray'),
+    }
+    KB_LABELS = ('visited', 'safe', 'warn', 'danger')
+    TILE_PRIORITY = ('danger', 'warn', 'safe', 'visited')  # tile gộp lấy nhãn đầu tiên có trong nó
+    VIEWPORT = 720      # cạnh tối đa của canvas (px), map lớn hơn thì cuộn/zoom
+    DETAIL_CELL = 12    # ô nhỏ hơn (px) thì vẽ tile gộp nhiều ô
+    TEXT_CELL = 24      # ô nhỏ hơn (px) thì không vẽ chữ
+    ZOOM_STEP = 1.25
+    FRAME_MS = 33        # auto run vẽ tối đa ~30 khung/giây
+    TURBO_SLICE = 0.02   # turbo: thời gian tối đa mỗi lần thread mô phỏng giữ lock
+    MAX_LOG_LINES = 500
+
+    RANDOM_MAP = "(random N, K, p, seed)"  # mục chọn map sinh từ tham số thay vì file
 
-    def __init__(self, N=4, K=1, p=0.2, seed=42):
+    def __init__(self, N=4, K=1, p=0.2, seed=42, random_map=False):
         super().__init__()
         self.title("Wumpus World GUI")
         self.N = N
         self.K = K
         self.p = p
         self.seed = seed
+        self.random_N = N  # self.N đổi theo map đang mở, map random luôn dùng N đã cho
+        self.random_map = random_map  # True: mở map random thay vì map1.json
         self.selected_map = None
         self.env = None
         self.agent = None
         self.running = False
         self.delay = 0.5
+        self.turbo = False
+        # Thread mô phỏng (auto run) và thread Tk dùng chung env/agent qua sim_lock
+        self.sim_lock = threading.RLock()
+        self.sim_thread = None
+        self.stop_event = threading.Event()
+        self.pending_log = []  # dòng log thread mô phỏng chờ thread Tk ghi
+        self.finished = False
+        self.last_percepts = 0
+        self.recorder = None   # ghi ván đang chơi (runner/replay.py)
+        self.replay = None     # bản ghi đang phát lại, nếu có
         self.map_files = self.scan_maps()
         self.create_widgets()
         self.set_default_map()
@@ -44,20 +80,23 @@ class WumpusGUI(tk.Tk):
         files = []
         if os.path.exists(testcases_dir):
             for fname in os.listdir(testcases_dir):
-                if fname.endswith(".json"):
+                if fname.endswith((".json", ".wmap")):
                     files.append(fname)
         files.sort()
-        return files
+        return [self.RANDOM_MAP] + files
 
     def set_default_map(self):
-        # Mặc định là map1.json nếu có
-        if "map1.json" in self.map_files:
+        # Mặc định là map1.json nếu có (hoặc map random nếu được yêu cầu)
+        if self.random_map or len(self.map_files) == 1:
+            self.cmb_map.current(0)
+            self.selected_map = self.RANDOM_MAP
+        elif "map1.json" in self.map_files:
             idx = self.map_files.index("map1.json")
             self.cmb_map.current(idx)
             self.selected_map = self.map_files[idx]
         else:
-            self.cmb_map.current(0)
-            self.selected_map = self.map_files[0]
+            self.cmb_map.current(1)
+            self.selected_map = self.map_files[1]
 
     def create_widgets(self):
         top_frame = tk.Frame(self)
@@ -80,6 +119,29 @@ class WumpusGUI(tk.Tk):
         self.btn_stop = tk.Button(top_frame, text="Pause", command=self.stop_auto, state=tk.DISABLED)
         self.btn_stop.pack(side=tk.LEFT, padx=5, pady=5)
 
+        # Tốc độ auto run: delay giữa các bước, hoặc turbo không giới hạn
+        self.scl_delay = tk.Scale(top_frame, from_=0, to=1000, orient=tk.HORIZONTAL, length=100,
+                                  label="Delay (ms)", command=self.set_delay)
+        self.scl_delay.set(int(self.delay * 1000))
+        self.scl_delay.pack(side=tk.LEFT, padx=5)
+        self.turbo_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(top_frame, text="Turbo", variable=self.turbo_var,
+                       command=self.set_turbo).pack(side=tk.LEFT, padx=5)
+
+        # Hiện xác suất nguy hiểm (pit hoặc wumpus) ở các ô biên
+        self.show_risk = tk.BooleanVar(value=False)
+        tk.Checkbutton(top_frame, text="Show probabilities", variable=self.show_risk,
+                       command=self.update_board).pack(side=tk.LEFT, padx=5)
+
+        # Zoom (con lăn chuột, +/-), cuộn (kéo chuột, phím mũi tên), đi theo agent
+        self.follow_agent = tk.BooleanVar(value=True)
+        tk.Checkbutton(top_frame, text="Follow agent", variable=self.follow_agent,
+                       command=self.update_board).pack(side=tk.LEFT, padx=5)
+        tk.Button(top_frame, text="+", width=2,
+                  command=lambda: self.zoom(self.ZOOM_STEP)).pack(side=tk.LEFT)
+        tk.Button(top_frame, text="-", width=2,
+                  command=lambda: self.zoom(1 / self.ZOOM_STEP)).pack(side=tk.LEFT)
+
         # Thêm info frame
         info_frame = tk.Frame(self)
         info_frame.pack(side=tk.TOP, fill=tk.X, padx=10)
@@ -93,11 +155,30 @@ class WumpusGUI(tk.Tk):
         self.lbl_scream = tk.Label(info_frame, text="", font=('Arial', 12, 'bold'), fg='red')
         self.lbl_scream.pack(side=tk.LEFT, padx=10)
 
+        # Ghi lại ván đang chơi / mở file .wrec và tua bằng thanh trượt
+        tk.Button(info_frame, text="Save Rec", command=self.save_recording).pack(side=tk.RIGHT, padx=5)
+        tk.Button(info_frame, text="Open Rec", command=self.open_recording).pack(side=tk.RIGHT, padx=5)
+        self.scl_step = tk.Scale(info_frame, from_=0, to=0, orient=tk.HORIZONTAL, length=240,
+                                 label="Replay step", command=self.on_scrub, state=tk.DISABLED)
+        self.scl_step.pack(side=tk.RIGHT, padx=5)
+
         self.log_text = tk.Text(self, height=8, width=55, bg="#21252b", fg="#C9D1D9")
         self.log_text.pack(side=tk.BOTTOM, fill=tk.X)
 
         self.canvas = tk.Canvas(self, width=self.N*self.CELL_SIZE, height=self.N*self.CELL_SIZE, bg='white')
         self.canvas.pack(side=tk.TOP, padx=10, pady=10)
+        self.canvas.bind('<MouseWheel>', self.on_wheel)
+        self.canvas.bind('<Button-4>', self.on_wheel)
+        self.canvas.bind('<Button-5>', self.on_wheel)
+        self.canvas.bind('<ButtonPress-1>', self.on_drag_start)
+        self.canvas.bind('<B1-Motion>', self.on_drag)
+        self.bind('<Left>', lambda e: self.pan(-self.pan_step(), 0))
+        self.bind('<Right>', lambda e: self.pan(self.pan_step(), 0))
+        self.bind('<Up>', lambda e: self.pan(0, self.pan_step()))
+        self.bind('<Down>', lambda e: self.pan(0, -self.pan_step()))
+        self.bind('<plus>', lambda e: self.zoom(self.ZOOM_STEP))
+        self.bind('<equal>', lambda e: self.zoom(self.ZOOM_STEP))
+        self.bind('<minus>', lambda e: self.zoom(1 / self.ZOOM_STEP))
 
     def log(self, message):
         self.log_text.insert(tk.END, message + "\n")
@@ -112,148 +193,479 @@ class WumpusGUI(tk.Tk):
         val = self.cmb_map.get() if hasattr(self, 'cmb_map') else self.map_files[0]
         self.selected_map = val
 
-        mapfile = os.path.join("testcases", self.selected_map)
-        # Auto size detection based on map file
-        try:
-            import json
-            with open(mapfile, 'r') as f:
-                data = json.load(f)
-            if "agent" in data:
-                size = max(
-                    [max(pos) for k in ["pit", "wumpus", "gold"] for pos in data.get(k, [])] +
-                    data["agent"]["pos"]
-                ) + 1
-                self.N = size
-            else:
-                self.N = len(data)
-        except:
-            self.N = 4
-
-        self.env = Environment(N=self.N, K=self.K, p=self.p, mapfile=mapfile)
-        self.agent = Agent(N=self.N)
-        self.running = False
+        self.join_sim()
+        if self.selected_map == self.RANDOM_MAP:
+            mapfile, seed = None, self.seed
+            self.env = Environment(N=self.random_N, K=self.K, p=self.p, seed=seed)
+        else:
+            mapfile, seed = os.path.join("testcases", self.selected_map), None
+            # Kích thước lấy từ map Environment đã nạp, không đọc file lần nữa
+            self.env = Environment(N=self.N, K=self.K, p=self.p, mapfile=mapfile)
+        self.N = self.env.N
+        self.agent = Agent(N=self.N, p=self.env.p, K=len(self.env.wumpus_pos))
+        self.recorder = Recorder(self.env, self.agent, header=dict(
+            agent='agent', seed=seed, mapfile=mapfile, K=len(self.env.wumpus_pos), p=self.env.p))
+        self.replay = None
+        self.scl_step.config(to=0, state=tk.DISABLED)
+        self.finished = False
+        self.last_percepts = 0
+        self.pending_log = []
         self.btn_next['state'] = tk.NORMAL
         self.btn_auto['state'] = tk.NORMAL
         self.btn_stop['state'] = tk.DISABLED
         self.log_text.delete('1.0', tk.END)
-        self.log(f"Đã tải map từ file: {self.selected_map}")
-        self.update_board()
-
-    def update_board(self):
-        self.canvas.config(width=self.N*self.CELL_SIZE, height=self.N*self.CELL_SIZE)
-        self.canvas.delete('all')
-        kb = self.agent.get_kb()
-        for i in range(self.N):
-            for j in range(self.N):
-                x1 = i * self.CELL_SIZE
-                y1 = (self.N-1-j) * self.CELL_SIZE
-                x2 = x1 + self.CELL_SIZE
-                y2 = y1 + self.CELL_SIZE
-                state = kb[j][i]
-                # Hiện đúng màu theo knowledge
-                fill = self.COLORS['unknown']
-                if state == 'safe':
-                    fill = self.COLORS['safe']
-                elif state == 'warn':
-                    fill = self.COLORS['warn']
-                elif state == 'danger':
-                    fill = self.COLORS['danger']
-                elif state == 'visited':
-                    fill = self.COLORS['visited']
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=fill, outline=self.COLORS['border'])
-                # Symbol trực quan
-                if state == 'warn':
-                    self.canvas.create_text(x1+30, y1+30, text="!", font=('Arial', 16, 'bold'), fill='orange')
-                elif state == 'danger':
-                    self.canvas.create_text(x1+30, y1+30, text="X", font=('Arial', 16, 'bold'), fill='red')
-                elif state == 'safe':
-                    self.canvas.create_text(x1+30, y1+30, text="S", font=('Arial', 14), fill='green')
-                elif state == 'visited':
-                    self.canvas.create_text(x1+30, y1+30, text="•", font=('Arial', 10), fill='gray')
-        # Vẽ item thật
-        for i in range(self.N):
-            for j in range(self.N):
-                cell = self.env.map[i][j]
-                x1 = i * self.CELL_SIZE
-                y1 = (self.N-1-j) * self.CELL_SIZE
-                if cell.has_pit:
-                    self.canvas.create_oval(x1+10, y1+35, x1+25, y1+50, fill=self.COLORS['pit'])
-                if cell.has_gold and not self.env.gold_grabbed:
-                    self.canvas.create_oval(x1+38, y1+10, x1+55, y1+25, fill=self.COLORS['gold'])
-                if cell.has_wumpus and getattr(self.env, "wumpus_alive", [True])[getattr(self.env, "wumpus_idx_at", lambda x, y: 0)(i, j)]:
-                    self.canvas.create_rectangle(x1+38, y1+35, x1+55, y1+52, fill=self.COLORS['wumpus'])
-        # Agent
+        if mapfile:
+            self.log(f"Đã tải map từ file: {self.selected_map}")
+        else:
+            self.log(f"Map random N={self.N} K={self.K} p={self.p} seed={seed}")
+        self.reset_view()
+        self.build_board()
+        self.refresh()
+
+    def reset_view(self):
+        """Map nhỏ thì canvas vừa đúng map như cũ; map lớn thì canvas giới hạn VIEWPORT"""
+        self.view_px = min(self.N * self.CELL_SIZE, self.VIEWPORT)
+        self.canvas.config(width=self.view_px, height=self.view_px)
+        self.cell_size = float(self.CELL_SIZE)
+        self.view_x = self.view_y = 0  # ô góc dưới trái đang nhìn thấy
+        self.gold_cells = {divmod(i, self.N) for i in iter_bits(self.env.gold_bits)}
+
+    def view_span(self):
+        """Số ô nhìn thấy theo mỗi chiều"""
+        return min(self.N, math.ceil(self.view_px / self.cell_size - 1e-9))
+
+    def clamp_view(self):
+        self.view_x = max(0, min(self.view_x, self.N - self.span))
+        self.view_y = max(0, min(self.view_y, self.N - self.span))
+
+    def in_view(self, i, j, margin=0):
+        return (self.view_x + margin <= i < self.view_x + self.span - margin and
+                self.view_y + margin <= j < self.view_y + self.span - margin)
+
+    def cell_origin(self, i, j):
+        # Hàng view_y nằm sát đáy canvas
+        cs = self.cell_size
+        return (i - self.view_x) * cs, self.view_px - (j - self.view_y + 1) * cs
+
+    def tile_of(self, i, j):
+        t = self.tile
+        return (self.view_x + (i - self.view_x) // t * t, self.view_y + (j - self.view_y) // t * t)
+
+    def build_board(self):
+        """Tạo canvas item cho các ô đang nhìn thấy (hoặc tile gộp nhiều ô khi zoom
+        nhỏ) mỗi khi đổi map/zoom/cuộn; các bước sau chỉ sửa ô thay đổi"""
+        # Thread mô phỏng có thể đang sửa env/agent
+        with self.sim_lock:
+            self.canvas.delete('all')
+            self.span = self.view_span()
+            self.clamp_view()
+            cs = self.cell_size
+            self.tile = 1 if cs >= self.DETAIL_CELL else math.ceil(self.DETAIL_CELL / cs)
+            self.cell_items = {}
+            self.drawn = {}
+            xs = range(self.view_x, self.view_x + self.span, self.tile)
+            ys = range(self.view_y, self.view_y + self.span, self.tile)
+            create = self.create_cell if self.tile == 1 else self.create_tile
+            for i in xs:
+                for j in ys:
+                    self.cell_items[(i, j)] = create(i, j)
+            self.agent_oval = self.canvas.create_oval(0, 0, 0, 0, fill=self.COLORS['agent'])
+            self.agent_text = None
+            if cs >= self.TEXT_CELL:
+                self.agent_text = self.canvas.create_text(0, 0, text="", fill='white',
+                                                          font=('Arial', round(16 * cs / 60)))
+            self.kb_rows = None
+            self.drawn_wumpus = set()
+            self.drawn_risk = {}
+            self.drawn_gold = None
+            self.update_board(full=True)
+
+    def create_cell(self, i, j):
+        cs = self.cell_size
+        f = cs / self.CELL_SIZE
+        x1, y1 = self.cell_origin(i, j)
+
+        def box(a, b, c, d):
+            return x1 + a*f, y1 + b*f, x1 + c*f, y1 + d*f
+
+        items = {
+            'rect': self.canvas.create_rectangle(x1, y1, x1 + cs, y1 + cs,
+                                                 fill=self.COLORS['unknown'], outline=self.COLORS['border']),
+            'symbol': None,
+            'risk': None,
+        }
+        if cs >= self.TEXT_CELL:
+            items['symbol'] = self.canvas.create_text(x1 + 30*f, y1 + 30*f, text="")
+            items['risk'] = self.canvas.create_text(x1 + 16*f, y1 + 10*f, text="", fill='black',
+                                                    font=('Arial', max(6, round(8 * f))))
+        # Pit không đổi trong cả game nên chỉ vẽ lúc tạo
+        if self.env.has_pit(i, j):
+            self.canvas.create_oval(*box(10, 35, 25, 50), fill=self.COLORS['pit'])
+        items['gold'] = self.canvas.create_oval(*box(38, 10, 55, 25), fill=self.COLORS['gold'], state=tk.HIDDEN)
+        items['wumpus'] = self.canvas.create_rectangle(*box(38, 35, 55, 52), fill=self.COLORS['wumpus'],
+                                                       state=tk.HIDDEN)
+        return items
+
+    def create_tile(self, i, j):
+        """Một tile tile x tile ô: tô theo nhãn quan trọng nhất, chấm wumpus/gold nếu có"""
+        cs = self.cell_size
+        w = min(self.tile, self.N - i) * cs
+        h = min(self.tile, self.N - j) * cs
+        x1, y2 = self.cell_origin(i, j)[0], self.cell_origin(i, j)[1] + cs
+        y1 = y2 - h
+        return {
+            'rect': self.canvas.create_rectangle(x1, y1, x1 + w, y2, fill=self.COLORS['unknown'], outline=''),
+            'gold': self.canvas.create_oval(x1 + w/2, y1, x1 + w, y1 + h/2,
+                                            fill=self.COLORS['gold'], outline='', state=tk.HIDDEN),
+            'wumpus': self.canvas.create_rectangle(x1 + w/2, y1 + h/2, x1 + w, y2,
+                                                   fill=self.COLORS['wumpus'], outline='', state=tk.HIDDEN),
+        }
+
+    def update_board(self, full=False):
+        """Vẽ lại các ô có nhãn kb, wumpus, gold hoặc xác suất thay đổi từ lần vẽ trước"""
+        with self.sim_lock:
+            if self.follow_agent.get() and self.span < self.N:
+                x, y = self.env.agent_pos
+                # Sát mép map thì view đã bị chặn, center_on không đổi gì
+                if not self.in_view(x, y, margin=self.span // 5) and self.center_on(x, y):
+                    return  # build_board đã vẽ lại toàn bộ
+            # Bản ghi của agent không có KB (vd. RandomAgent từ runner.headless):
+            # bỏ lớp KB và xác suất, vẫn vẽ wumpus, gold và agent
+            bits = getattr(self.agent, 'bits', None)
+            dirty = set()
+            if bits is None:
+                self.kb_rows = None
+            elif full or self.kb_rows is None:
+                full = True
+            else:
+                # So từng hàng bitboard với lần vẽ trước, chỉ lấy các bit khác nhau
+                for label in self.KB_LABELS:
+                    old_rows, new_rows = self.kb_rows[label], getattr(bits, label)
+                    for j in range(self.N):
+                        changed = old_rows[j] ^ new_rows[j]
+                        for i in iter_row(changed):
+                            dirty.add((i, j))
+            if bits is not None:
+                self.kb_rows = {label: list(getattr(bits, label)) for label in self.KB_LABELS}
+
+            wumpus = {pos for pos, idx in self.env.wumpus_at.items() if self.env.wumpus_alive[idx]}
+            dirty |= wumpus ^ self.drawn_wumpus
+            self.drawn_wumpus = wumpus
+
+            risk = {}
+            if (bits is not None and self.show_risk.get() and self.tile == 1
+                    and self.cell_size >= self.TEXT_CELL):
+                risk = {c: f"{r:.0%}" for c, (p_pit, p_wumpus, r) in self.agent.get_risk().items()}
+            dirty.update(c for c in risk.keys() | self.drawn_risk.keys()
+                         if risk.get(c) != self.drawn_risk.get(c))
+            self.drawn_risk = risk
+
+            if self.drawn_gold != self.env.gold_grabbed:
+                self.drawn_gold = self.env.gold_grabbed
+                dirty |= self.gold_cells
+
+            if self.tile == 1:
+                cells = self.cell_items if full else [c for c in dirty if c in self.cell_items]
+                for i, j in cells:
+                    state = bits.label(i, j) if bits is not None else 'unknown'
+                    self.draw_cell(i, j, state, (i, j) in wumpus, risk.get((i, j), ""))
+            else:
+                tiles = self.cell_items if full else {self.tile_of(*c) for c in dirty} & self.cell_items.keys()
+                for t in tiles:
+                    self.draw_tile(*t)
+            self.draw_agent()
+
+    def draw_agent(self):
         x, y = self.env.agent_pos
-        x1 = x * self.CELL_SIZE
-        y1 = (self.N-1-y) * self.CELL_SIZE
-        self.canvas.create_oval(x1+12, y1+12, x1+48, y1+48, fill=self.COLORS['agent'])
-        self.canvas.create_text(x1+30, y1+30, text=self.DIR_ARROW[self.env.agent_dir], font=('Arial', 16), fill='white')
+        if not self.in_view(x, y):
+            self.canvas.itemconfigure(self.agent_oval, state=tk.HIDDEN)
+            if self.agent_text is not None:
+                self.canvas.itemconfigure(self.agent_text, state=tk.HIDDEN)
+            return
+        cs = self.cell_size
+        x1, y1 = self.cell_origin(x, y)
+        # Zoom nhỏ thì giữ agent đủ lớn để còn thấy
+        r = max(cs * 0.3, 3)
+        cx, cy = x1 + cs / 2, y1 + cs / 2
+        self.canvas.coords(self.agent_oval, cx - r, cy - r, cx + r, cy + r)
+        self.canvas.itemconfigure(self.agent_oval, state=tk.NORMAL)
+        if self.agent_text is not None:
+            self.canvas.coords(self.agent_text, cx, cy)
+            self.canvas.itemconfigure(self.agent_text, state=tk.NORMAL,
+                                      text=self.DIR_ARROW[self.env.agent_dir])
 
-    def next_step(self):
-        if not self.env.agent_alive:
-            self.log("Agent đã chết! Không thể đi tiếp.")
-            self.btn_next['state'] = tk.DISABLED
-            self.btn_auto['state'] = tk.DISABLED
-            self.btn_stop['state'] = tk.DISABLED
+    def draw_cell(self, i, j, state, wumpus, risk):
+        gold = (i, j) in self.gold_cells and not self.env.gold_grabbed
+        look = (state, wumpus, gold, risk)
+        if self.drawn.get((i, j)) == look:
+            return
+        old = self.drawn.get((i, j), (None, None, None, None))
+        self.drawn[(i, j)] = look
+        items = self.cell_items[(i, j)]
+        if old[0] != state:
+            # Hiện đúng màu và ký hiệu theo knowledge
+            self.canvas.itemconfigure(items['rect'], fill=self.COLORS[state])
+            if items['symbol'] is not None:
+                text, font, color = self.SYMBOLS[state]
+                font = (font[0], round(font[1] * self.cell_size / self.CELL_SIZE)) + font[2:]
+                self.canvas.itemconfigure(items['symbol'], text=text, font=font, fill=color)
+        if old[1] != wumpus:
+            self.canvas.itemconfigure(items['wumpus'], state=tk.NORMAL if wumpus else tk.HIDDEN)
+        if old[2] != gold:
+            self.canvas.itemconfigure(items['gold'], state=tk.NORMAL if gold else tk.HIDDEN)
+        if old[3] != risk and items['risk'] is not None:
+            self.canvas.itemconfigure(items['risk'], text=risk)
+
+    def draw_tile(self, i, j):
+        bits = getattr(self.agent, 'bits', None)
+        w, h = min(self.tile, self.N - i), min(self.tile, self.N - j)
+        mask = ((1 << w) - 1) << i
+        state = 'unknown'
+        for label in self.TILE_PRIORITY if bits is not None else ():
+            rows = getattr(bits, label)
+            if any(rows[y] & mask for y in range(j, j + h)):
+                state = label
+                break
+        inside = lambda c: i <= c[0] < i + w and j <= c[1] < j + h
+        wumpus = any(map(inside, self.drawn_wumpus))
+        gold = not self.env.gold_grabbed and any(map(inside, self.gold_cells))
+        look = (state, wumpus, gold)
+        if self.drawn.get((i, j)) == look:
             return
+        self.drawn[(i, j)] = look
+        items = self.cell_items[(i, j)]
+        self.canvas.itemconfigure(items['rect'], fill=self.COLORS[state])
+        self.canvas.itemconfigure(items['wumpus'], state=tk.NORMAL if wumpus else tk.HIDDEN)
+        self.canvas.itemconfigure(items['gold'], state=tk.NORMAL if gold else tk.HIDDEN)
+
+    # --- Cuộn / zoom ---------------------------------------------------------
+
+    def center_on(self, i, j):
+        """Đưa (i, j) vào giữa view; trả về True nếu view thay đổi (đã vẽ lại)"""
+        return self.pan(i - self.span // 2 - self.view_x, j - self.span // 2 - self.view_y)
+
+    def pan(self, dx, dy):
+        old = (self.view_x, self.view_y)
+        self.view_x += dx
+        self.view_y += dy
+        self.clamp_view()
+        if (self.view_x, self.view_y) == old:
+            return False
+        self.build_board()
+        return True
+
+    def pan_step(self):
+        return max(1, self.span // 4)
+
+    def zoom(self, factor):
+        """Phóng to/thu nhỏ quanh tâm view, nhỏ nhất là cả map vừa canvas"""
+        cs = min(float(self.CELL_SIZE), max(self.view_px / self.N, self.cell_size * factor))
+        if cs == self.cell_size:
+            return
+        center = (self.view_x + self.span / 2, self.view_y + self.span / 2)
+        self.cell_size = cs
+        self.span = self.view_span()
+        self.view_x = round(center[0] - self.span / 2)
+        self.view_y = round(center[1] - self.span / 2)
+        self.build_board()
+
+    def on_wheel(self, event):
+        zoom_in = event.num == 4 or getattr(event, 'delta', 0) > 0
+        self.zoom(self.ZOOM_STEP if zoom_in else 1 / self.ZOOM_STEP)
+
+    def on_drag_start(self, event):
+        self.drag = (event.x, event.y, self.view_x, self.view_y)
+
+    def on_drag(self, event):
+        x0, y0, vx, vy = self.drag
+        dx = vx - round((event.x - x0) / self.cell_size) - self.view_x
+        dy = vy + round((event.y - y0) / self.cell_size) - self.view_y
+        if dx or dy:
+            self.pan(dx, dy)
+
+    def advance(self):
+        """Chạy một bước mô phỏng, trả về các dòng log.
+
+        Không gọi Tk nên chạy được trong thread mô phỏng (gọi khi giữ sim_lock).
+        """
         percepts = self.env.get_percepts()
         action = self.agent.next_action(percepts)
         self.env.step(action)
         self.agent.update_agent_state(action, percepts)
-        
-        # Cập nhật thông tin hiển thị
-        self.lbl_score.config(text=f"Score: {self.env.score}")
-        self.lbl_arrows.config(text=f"Arrows: {self.env.agent_arrows}")
-        
-        # Hiển thị scream
-        if percepts.get('scream', False):
-            self.lbl_scream.config(text="SCREAM! 💀")
-            self.log("💀 SCREAM! Wumpus đã bị giết!")
-        else:
-            self.lbl_scream.config(text="")
-        self.log(f"Percepts: {percepts} | Action: {action}")
-        self.update_board()
+        self.last_percepts = percepts
+        if self.recorder is not None:
+            self.recorder.record(action)
+
+        lines = []
+        if percepts & SCREAM:
+            lines.append("💀 SCREAM! Wumpus đã bị giết!")
+        lines.append(f"Percepts: {describe(percepts)} | Action: {action}")
+        if not self.env.agent_alive:
+            lines.append("Agent đã chết! Game Over.")
+            self.finished = True
         # END GAME chỉ khi agent đã về nhà và climb
-        if action == 'climb' and self.agent.has_gold and self.agent.x == 0 and self.agent.y == 0:
-            self.log("🎉 Agent đã lấy vàng và thoát ra ngoài thành công!")
+        elif action == 'climb' and self.agent.has_gold and self.agent.x == 0 and self.agent.y == 0:
+            lines.append("🎉 Agent đã lấy vàng và thoát ra ngoài thành công!")
+            self.finished = True
+        elif self.env.agent_escaped:
+            lines.append("Agent đã thoát ra ngoài mà không có vàng.")
+            self.finished = True
+        return lines
+
+    def refresh(self):
+        """Vẽ trạng thái hiện tại: điểm, scream, bàn cờ (chạy trên thread Tk)"""
+        with self.sim_lock:
+            self.lbl_score.config(text=f"Score: {self.env.score}")
+            self.lbl_arrows.config(text=f"Arrows: {self.env.agent_arrows}")
+            # Hiển thị scream
+            scream = self.last_percepts & SCREAM
+            self.lbl_scream.config(text="SCREAM! 💀" if scream else "")
+            self.update_board()
+        if self.finished:
             self.btn_next['state'] = tk.DISABLED
             self.btn_auto['state'] = tk.DISABLED
             self.btn_stop['state'] = tk.DISABLED
 
+    def log_lines(self, lines):
+        """Ghi nhiều dòng log một lần, chỉ giữ MAX_LOG_LINES dòng cuối"""
+        if not lines:
+            return
+        skipped = len(lines) - self.MAX_LOG_LINES
+        if skipped > 0:
+            lines = [f"... ({skipped} dòng bị bỏ qua)"] + lines[skipped:]
+        self.log("\n".join(lines))
+        extra = int(self.log_text.index('end-1c').split('.')[0]) - self.MAX_LOG_LINES
+        if extra > 0:
+            self.log_text.delete('1.0', f'{extra + 1}.0')
+
+    def next_step(self):
+        if self.replay is not None:
+            self.scl_step.set(self.replay.step + 1)  # on_scrub tua tới bước đó
+            return
+        if self.finished:
+            self.btn_next['state'] = tk.DISABLED
+            return
+        with self.sim_lock:
+            lines = self.advance()
+        self.log_lines(lines)
+        self.refresh()
+
+    def save_recording(self):
+        if self.recorder is None:
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".wrec",
+                                            filetypes=[("Episode recording", "*.wrec")])
+        if not path:
+            return
+        with self.sim_lock:
+            outcome = ('dead' if not self.env.agent_alive else
+                       'escaped' if self.env.agent_escaped else 'running')
+            self.recorder.save(path, score=self.env.score, outcome=outcome)
+        self.log(f"Đã ghi {len(self.recorder.actions)} bước vào {path}")
+
+    def open_recording(self):
+        path = filedialog.askopenfilename(filetypes=[("Episode recording", "*.wrec")])
+        if not path:
+            return
+        self.join_sim()
+        self.replay = Replay(path)
+        self.recorder = None
+        self.env, self.agent = self.replay.env, self.replay.agent
+        self.N = self.env.N
+        self.finished = False
+        self.last_percepts = 0
+        self.btn_auto['state'] = tk.DISABLED
+        self.btn_stop['state'] = tk.DISABLED
+        self.btn_next['state'] = tk.NORMAL
+        self.log_text.delete('1.0', tk.END)
+        self.log(f"Phát lại {path}: {self.replay.header}")
+        self.reset_view()
+        self.build_board()
+        self.scl_step.config(to=len(self.replay), state=tk.NORMAL)
+        self.scl_step.set(0)
+        self.refresh()
+
+    def on_scrub(self, value):
+        """Thanh trượt: tua bản ghi tới bước value"""
+        if self.replay is None:
+            return
+        k = int(float(value))
+        if k == self.replay.step:
+            return
+        with self.sim_lock:
+            self.env, self.agent = self.replay.seek(k)
+            self.last_percepts = self.replay.percepts
+        if k > 0:
+            self.log(f"Bước {k}: Action: {self.replay.action(k - 1)} | Score: {self.env.score}")
+        self.refresh()
+
+    def set_turbo(self):
+        # Thread mô phỏng chỉ đọc thuộc tính thường, không đọc biến Tk
+        self.turbo = self.turbo_var.get()
+
+    def set_delay(self, value):
+        self.delay = int(float(value)) / 1000
+
     def start_auto(self):
+        if self.finished or (self.sim_thread and self.sim_thread.is_alive()):
+            return
         self.running = True
+        self.stop_event.clear()
         self.btn_auto['state'] = tk.DISABLED
         self.btn_stop['state'] = tk.NORMAL
         self.btn_next['state'] = tk.DISABLED
-        threading.Thread(target=self.auto_loop, daemon=True).start()
+        self.sim_thread = threading.Thread(target=self.auto_loop, daemon=True)
+        self.sim_thread.start()
+        self.after(self.FRAME_MS, self.render_frame)
 
     def stop_auto(self):
         self.running = False
-        self.btn_auto['state'] = tk.NORMAL
+        self.stop_event.set()
+        if not self.finished:
+            self.btn_auto['state'] = tk.NORMAL
+            self.btn_next['state'] = tk.NORMAL
         self.btn_stop['state'] = tk.DISABLED
-        self.btn_next['state'] = tk.NORMAL
+
+    def join_sim(self):
+        """Dừng hẳn thread mô phỏng (trước khi thay env/agent)"""
+        self.running = False
+        self.stop_event.set()
+        if self.sim_thread is not None:
+            self.sim_thread.join()
+            self.sim_thread = None
 
     def auto_loop(self):
-        while self.running and self.env.agent_alive:
-            percepts = self.env.get_percepts()
-            action = self.agent.next_action(percepts)
-            self.env.step(action)
-            self.agent.update_agent_state(action, percepts)
-            self.log(f"Percepts: {percepts} | Action: {action}")
-            self.update_board()
-            if not self.env.agent_alive:
-                self.log("Agent đã chết! Game Over.")
-                self.btn_next['state'] = tk.DISABLED
-                self.btn_auto['state'] = tk.DISABLED
-                self.btn_stop['state'] = tk.DISABLED
-                break
-            if action == 'climb' and self.agent.has_gold and self.agent.x == 0 and self.agent.y == 0:
-                self.log("🎉 Agent đã lấy vàng và thoát ra ngoài thành công!")
-                self.btn_next['state'] = tk.DISABLED
-                self.btn_auto['state'] = tk.DISABLED
-                self.btn_stop['state'] = tk.DISABLED
-                break
-            time.sleep(self.delay)
+        """Thread mô phỏng: chỉ sửa env/agent dưới sim_lock, không gọi Tk.
+
+        Bình thường chạy một bước rồi chờ delay; turbo thì chạy liên tục, mỗi lần
+        giữ lock tối đa TURBO_SLICE giây để thread Tk còn vẽ được.
+        """
+        while self.running:
+            with self.sim_lock:
+                end = time.perf_counter() + self.TURBO_SLICE
+                while self.running:
+                    self.pending_log.extend(self.advance())
+                    if self.finished:
+                        self.running = False
+                    if not self.turbo or time.perf_counter() >= end:
+                        break
+            if not self.turbo:
+                self.stop_event.wait(self.delay)
+            else:
+                time.sleep(0)  # nhường GIL cho thread Tk
+
+    def render_frame(self):
+        """Vẽ một khung (thread Tk): gộp mọi bước và dòng log từ khung trước"""
+        with self.sim_lock:
+            lines, self.pending_log = self.pending_log, []
+        self.log_lines(lines)
+        self.refresh()
+        if self.sim_thread is not None and self.sim_thread.is_alive():
+            self.after(self.FRAME_MS, self.render_frame)
+        elif not self.finished and not self.running:
+            # Đã pause: thread dừng sau bước đang chạy, vẽ nốt rồi thôi
+            self.btn_auto['state'] = tk.NORMAL
+            self.btn_next['state'] = tk.NORMAL
 
 if __name__ == '__main__':
     app = WumpusGUI()